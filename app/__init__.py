@@ -24,21 +24,43 @@
 
     #return app
 
+import os
 from flask import Flask
-from app.extensions import db, migrate
+from app.extensions import db, migrate, cache, etags, pool_monitor, metrics, order_intake, idempotency, replicas, leaderboard
+from app.pool import engine_options
+from app.replicas import replica_binds
+from app.serializers import JSONProvider
 
-def create_app():
+def create_app(config_object=None):
     app = Flask(__name__)
-    app.config.from_object('config.Config')  
+    app.json = JSONProvider(app)
+    # APP_CONFIG picks the environment, e.g. config.ProductionConfig
+    app.config.from_object(config_object or os.environ.get('APP_CONFIG', 'config.Config'))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(app.config)
 
     db.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    etags.init_app(app)
+    pool_monitor.init_app(app)
+    metrics.init_app(app)
+    order_intake.init_app(app)
+    idempotency.init_app(app)
+    replicas.init_app(app)
+    leaderboard.init_app(app)
 
     from app.models.product import Product #  Import models for migration detection
     from app.models.category import Category 
     from app.models.customer import Customer
     from app.models.order import Order
     from app.models.order_item import OrderItem 
+    from app.models.table_version import TableVersion
+    from app.models.product_tombstone import ProductTombstone
+    from app.models.category_stats import CategoryStats
+    from app.models.sales_rollup import SalesDaily, SalesDailyProduct, SalesDailyCategory, RollupWatermark
+    from app.models.idempotency_key import IdempotencyKey
+    from app.models.stock import StockBucket, StockReservation
                  
     #from app.routes import ecommerce_bp        #  Register routes
     #app.register_blueprint(ecommerce_bp)
@@ -48,11 +70,33 @@ def create_app():
     from app.controllers.category_controller import category_bp
     from app.controllers.customer_controller import customer_bp
     from app.controllers.order_controller import order_bp
+    from app.controllers.export_controller import export_bp
+    from app.controllers.stats_controller import stats_bp
+    from app.controllers.report_controller import report_bp
+    from app.controllers.stock_controller import stock_bp
 
     app.register_blueprint(product_bp)
     app.register_blueprint(category_bp)
     app.register_blueprint(customer_bp)
     app.register_blueprint(order_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(report_bp)
+    app.register_blueprint(stock_bp)
+
+    # CLI: flask seed / bench / bench-stock / rebuild-category-stats / rollup-sales /
+    # purge-idempotency-keys / release-reservations
+    from app.commands import (
+        seed_command, bench_command, bench_stock_command, rebuild_category_stats_command, rollup_sales_command,
+        purge_idempotency_keys_command, release_reservations_command
+    )
+    app.cli.add_command(seed_command)
+    app.cli.add_command(bench_command)
+    app.cli.add_command(rebuild_category_stats_command)
+    app.cli.add_command(rollup_sales_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(release_reservations_command)
+    app.cli.add_command(bench_stock_command)
 
     @app.route("/")
     def home():
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from app.db_events import on_commit, track_changes
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Every entry carries tags (table names) so that a write to a table drops
+    all the entries built from it.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+class Cache:
+    """Read-through cache for serialized JSON responses, invalidated on commit."""
+
+    def __init__(self):
+        self.store = TTLCache()
+        self.enabled = True
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        self.store.max_entries = app.config.get('CACHE_MAX_ENTRIES', 1024)
+        self.store.ttl = app.config.get('CACHE_TTL_SECONDS', 60)
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        track_changes(db.session)
+        on_commit(self.store.invalidate)
+
+    def cached_json(self, tables, build):
+        # Returns the cached body for this URL or builds, serializes and caches it.
+        # `tables` are the tables the body is read from.
+        from app.extensions import replicas
+
+        if not self.enabled:
+            return current_app.json.response(build())
+        key = replicas.cache_scope() + request.full_path
+        body = self.store.get(key)
+        if body is None:
+            body = current_app.json.dumps(build())
+            self.store.set(key, body, tables)
+        return Response(body, mimetype='application/json')
+
+    def stats(self):
+        return self.store.stats()
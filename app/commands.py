@@ -0,0 +1,463 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib import error as urlerror, request as urlrequest
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions import db, idempotency
+from app.models.category import Category
+from app.models.category_stats import CategoryStats, apply_product_changes, refresh_category_stats
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.stock import StockBucket
+from app.services.inventory import OutOfStock, release_expired, set_stock, stock_levels, take_stock
+from app.services.sales_rollup import DEFAULT_BATCH_SIZE, rollup_sales
+
+
+# ---------------------------------------------------------------- seeding
+
+def _next_id(model):
+    return (db.session.scalar(db.select(db.func.max(model.id))) or 0) + 1
+
+
+def _bulk_insert(model, rows, chunk_size):
+    # Core executemany per chunk: no ORM objects, no per-row round trips
+    table = model.__table__
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(table.insert(), rows[start:start + chunk_size])
+    db.session.commit()
+
+
+def seed_rows(categories, products, customers, orders, items_per_order, days, chunk_size, rng):
+    now = datetime.now()
+    counts = {}
+
+    first = _next_id(Category)
+    category_ids = range(first, first + categories)
+    _bulk_insert(Category, [{'id': i, 'name': f'Category {i}'} for i in category_ids], chunk_size)
+    counts['categories'] = categories
+
+    first = _next_id(Product)
+    product_ids = range(first, first + products)
+    prices = {i: round(rng.uniform(1, 500), 2) for i in product_ids}
+    product_rows = [{
+        'id': i,
+        'name': f'Product {i}',
+        'price': prices[i],
+        'description': f'Seeded product {i}',
+        'category_id': rng.choice(category_ids),
+        'created_at': now - timedelta(seconds=rng.randrange(days * 86400))
+    } for i in product_ids]
+    _bulk_insert(Product, product_rows, chunk_size)
+    apply_product_changes(db.session.connection(), added=[(r['category_id'], r['price']) for r in product_rows])
+    db.session.commit()
+    counts['products'] = products
+
+    first = _next_id(Customer)
+    customer_ids = range(first, first + customers)
+    _bulk_insert(Customer, [{
+        'id': i,
+        'name': f'Customer {i}',
+        'email': f'customer{i}@example.com',
+        'created_at': now - timedelta(seconds=rng.randrange(days * 86400))
+    } for i in customer_ids], chunk_size)
+    counts['customers'] = customers
+
+    # Orders and items are generated chunk by chunk to bound memory
+    order_id = _next_id(Order)
+    item_id = _next_id(OrderItem)
+    counts['orders'] = counts['order_items'] = 0
+    for start in range(0, orders, chunk_size):
+        order_rows, item_rows = [], []
+        for _ in range(min(chunk_size, orders - start)):
+            created_at = now - timedelta(seconds=rng.randrange(days * 86400))
+            order_rows.append({'id': order_id, 'customer_id': rng.choice(customer_ids), 'created_at': created_at})
+            for _ in range(rng.randint(1, items_per_order)):
+                product_id = rng.choice(product_ids)
+                item_rows.append({
+                    'id': item_id,
+                    'order_id': order_id,
+                    'product_id': product_id,
+                    'quantity': rng.randint(1, 5),
+                    'unit_price': prices[product_id],
+                    'created_at': created_at
+                })
+                item_id += 1
+            order_id += 1
+        db.session.execute(Order.__table__.insert(), order_rows)
+        db.session.execute(OrderItem.__table__.insert(), item_rows)
+        db.session.commit()
+        counts['orders'] += len(order_rows)
+        counts['order_items'] += len(item_rows)
+    return counts
+
+
+@click.command('seed')
+@click.option('--categories', default=50, show_default=True)
+@click.option('--products', default=10000, show_default=True)
+@click.option('--customers', default=5000, show_default=True)
+@click.option('--orders', default=20000, show_default=True)
+@click.option('--items-per-order', default=4, show_default=True, help='Maximum items per order.')
+@click.option('--days', default=90, show_default=True, help='Spread created_at over this many days.')
+@click.option('--chunk-size', default=10000, show_default=True)
+@click.option('--create-tables', is_flag=True, help='Run db.create_all() first (local SQLite).')
+@click.option('--random-seed', default=42, show_default=True)
+@with_appcontext
+def seed_command(categories, products, customers, orders, items_per_order, days, chunk_size,
+                 create_tables, random_seed):
+    """Fill the database with generated categories, products, customers and orders."""
+    if create_tables:
+        db.create_all()
+    if db.engine.dialect.name == 'sqlite':
+        db.session.connection().exec_driver_sql('PRAGMA synchronous = OFF')
+
+    start = time.perf_counter()
+    counts = seed_rows(categories, products, customers, orders, items_per_order, days, chunk_size,
+                       random.Random(random_seed))
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    click.echo(json.dumps({
+        'rows': counts,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(total / elapsed) if elapsed else None
+    }, indent=2))
+
+
+@click.command('rebuild-category-stats')
+@with_appcontext
+def rebuild_category_stats_command():
+    """Recompute category_stats from products (after manual edits or a restore)."""
+    start = time.perf_counter()
+    refresh_category_stats(db.session.connection())
+    db.session.commit()
+    click.echo(json.dumps({
+        'categories': db.session.scalar(db.select(db.func.count()).select_from(CategoryStats)),
+        'seconds': round(time.perf_counter() - start, 3)
+    }, indent=2))
+
+
+@click.command('rollup-sales')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True, help='Order items per transaction.')
+@click.option('--follow', is_flag=True, help='Keep running, catching up every --interval seconds.')
+@click.option('--interval', default=60, show_default=True)
+@with_appcontext
+def rollup_sales_command(batch_size, follow, interval):
+    """Fold order items added since the last run into the sales rollups."""
+    while True:
+        start = time.perf_counter()
+        count = rollup_sales(batch_size)
+        click.echo(json.dumps({'order_items': count, 'seconds': round(time.perf_counter() - start, 3)}))
+        if not follow:
+            return
+        time.sleep(interval)
+
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys_command():
+    """Delete expired Idempotency-Key records."""
+    click.echo(json.dumps({'deleted': idempotency.purge()}))
+
+
+@click.command('release-reservations')
+@with_appcontext
+def release_reservations_command():
+    """Return the stock of expired reservations; schedule it, e.g. every minute."""
+    released = 0
+    while True:
+        count = release_expired()
+        db.session.commit()
+        released += count
+        if not count:
+            break
+    click.echo(json.dumps({'released': released}))
+
+
+# ---------------------------------------------------------------- benchmark
+
+def _fresh_ids(model, rows):
+    # Rows created before the timed run for the DELETE scenarios
+    first = _next_id(model)
+    ids = list(range(first, first + len(rows)))
+    db.session.execute(model.__table__.insert(), [dict(row, id=i) for i, row in zip(ids, rows)])
+    db.session.commit()
+    return ids
+
+
+def bench_scenarios(n, rng):
+    # Each scenario is (name, [(method, path, body)]), prepared before timing. The body
+    # is sent as JSON, or as NDJSON when it is a string.
+    max_product = _next_id(Product) - 1
+    max_category = _next_id(Category) - 1
+    max_customer = _next_id(Customer) - 1
+    max_order = _next_id(Order) - 1
+    if not (max_product and max_category and max_customer):
+        raise click.ClickException('The database is empty, run `flask seed` first.')
+
+    product = lambda: rng.randint(1, max_product)
+    category = lambda: rng.randint(1, max_category)
+    customer = lambda: rng.randint(1, max_customer)
+    order = lambda: rng.randint(1, max(max_order, 1))
+    tag = f'{time.time_ns()}'
+
+    def import_body(batch):
+        return '\n'.join(json.dumps({'name': 'bench', 'price': 5.0, 'category_id': category(),
+                                     'sku': f'bench-{tag}-{batch}-{i}'}) for i in range(100))
+
+    def order_body():
+        return {'customer_id': customer(),
+                'items': [{'product_id': product(), 'quantity': rng.randint(1, 3)} for _ in range(rng.randint(1, 4))]}
+
+    product_rows = [{'name': 'bench', 'price': 1.0, 'category_id': category()} for _ in range(n)]
+    category_rows = [{'name': 'bench'} for _ in range(n)]
+    customer_rows = [{'name': 'bench', 'email': f'bench-{tag}-{i}@example.com'} for i in range(n)]
+
+    return [
+        ('products.list', [('GET', f'/api/v1/products/?after={rng.randint(0, max_product)}', None) for _ in range(n)]),
+        ('products.stream', [('GET', f'/api/v1/products/?stream=1&after={max(max_product - 1000, 0)}', None) for _ in range(n)]),
+        ('products.filter', [('GET', f'/api/v1/products/?category_id={category()}&price[lte]={rng.randint(10, 500)}&sort=-price', None) for _ in range(n)]),
+        ('products.search', [('GET', f'/api/v1/products/search?q=product+{product()}', None) for _ in range(n)]),
+        ('products.get', [('GET', f'/api/v1/products/{product()}', None) for _ in range(n)]),
+        ('products.create', [('POST', '/api/v1/products/', {'name': 'bench', 'price': 9.5, 'category_id': category()}) for _ in range(n)]),
+        ('products.update', [('PUT', f'/api/v1/products/{product()}', {'price': round(rng.uniform(1, 500), 2)}) for _ in range(n)]),
+        ('products.import', [('POST', '/api/v1/products/import?upsert=1', import_body(b)) for b in range(n)]),
+        ('products.delete', [('DELETE', f'/api/v1/products/{i}', None) for i in _fresh_ids(Product, product_rows)]),
+        ('categories.list', [('GET', '/api/v1/categories/', None) for _ in range(n)]),
+        ('categories.get', [('GET', f'/api/v1/categories/{category()}', None) for _ in range(n)]),
+        ('categories.create', [('POST', '/api/v1/categories/', {'name': 'bench'}) for _ in range(n)]),
+        ('categories.update', [('PUT', f'/api/v1/categories/{category()}', {'name': f'Category {tag}'}) for _ in range(n)]),
+        ('categories.delete', [('DELETE', f'/api/v1/categories/{i}', None) for i in _fresh_ids(Category, category_rows)]),
+        ('customers.list', [('GET', '/api/v1/customers/', None) for _ in range(n)]),
+        ('customers.orders', [('GET', f'/api/v1/customers/{customer()}/orders', None) for _ in range(n)]),
+        ('customers.create', [('POST', '/api/v1/customers/', {'name': 'bench', 'email': f'bench-{tag}-new-{i}@example.com'}) for i in range(n)]),
+        ('customers.update', [('PUT', f'/api/v1/customers/{customer()}', {'name': f'Customer {tag}'}) for _ in range(n)]),
+        ('customers.delete', [('DELETE', f'/api/v1/customers/{i}', None) for i in _fresh_ids(Customer, customer_rows)]),
+        ('orders.list', [('GET', f'/api/v1/orders/?customer_id={customer()}&sort=-created_at', None) for _ in range(n)]),
+        ('orders.get', [('GET', f'/api/v1/orders/{order()}', None) for _ in range(n)]),
+        ('orders.create', [('POST', '/api/v1/orders/', order_body()) for _ in range(n)]),
+        ('orders.batch', [('POST', '/api/v1/orders/batch', {'orders': [order_body() for _ in range(20)]}) for _ in range(n)]),
+    ]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[index]
+
+
+class _InProcessClient:
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def __call__(self, method, path, body):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        if isinstance(body, str):
+            response = client.open(path, method=method, data=body, content_type='application/x-ndjson')
+        else:
+            response = client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code
+
+
+class _HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def __call__(self, method, path, body):
+        content_type = 'application/x-ndjson' if isinstance(body, str) else 'application/json'
+        if isinstance(body, str):
+            data = body.encode()
+        else:
+            data = json.dumps(body).encode() if body is not None else None
+        req = urlrequest.Request(self.base_url + path, data=data, method=method,
+                                 headers={'Content-Type': content_type})
+        try:
+            with urlrequest.urlopen(req) as response:
+                response.read()
+                return response.status
+        except urlerror.HTTPError as e:
+            return e.code
+
+
+def run_scenario(send, requests, concurrency):
+    def timed(spec):
+        start = time.perf_counter()
+        status = send(*spec)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, requests))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, status in results if status >= 500),
+        'statuses': statuses,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(results) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50), 3),
+            'p95': round(_percentile(latencies, 95), 3),
+            'p99': round(_percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3)
+        }
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.command('bench')
+@click.option('--requests', 'n', default=200, show_default=True, help='Requests per scenario.')
+@click.option('--concurrency', default=8, show_default=True)
+@click.option('--url', default=None, help='Base URL of a running server. Uses the in-process test client when omitted.')
+@click.option('--scenario', 'only', multiple=True, help='Only run scenarios starting with this prefix.')
+@click.option('--output', type=click.File('w'), default='-', help='Where to write the JSON report.')
+@click.option('--random-seed', default=42, show_default=True)
+@with_appcontext
+def bench_command(n, concurrency, url, only, output, random_seed):
+    """Drive every route concurrently and report throughput and latency percentiles as JSON."""
+    app = current_app._get_current_object()
+    send = _HttpClient(url) if url else _InProcessClient(app)
+    scenarios = bench_scenarios(n, random.Random(random_seed))
+    db.session.remove()
+
+    report = {
+        'commit': _git_commit(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'target': url or 'in-process',
+        'database': db.engine.dialect.name,
+        'concurrency': concurrency,
+        'requests_per_scenario': n,
+        'scenarios': {}
+    }
+    for name, requests in scenarios:
+        if only and not name.startswith(tuple(only)):
+            continue
+        report['scenarios'][name] = result = run_scenario(send, requests, concurrency)
+        click.echo(f"{name:20} {result['throughput_rps']:>9} req/s  p50 {result['latency_ms']['p50']:>8} ms"
+                   f"  p99 {result['latency_ms']['p99']:>8} ms  errors {result['errors']}", err=True)
+    output.write(json.dumps(report, indent=2) + '\n')
+
+
+MAX_CHECKOUT_FAILURES = 20  # failed checkouts in a row before a bench worker gives up
+
+
+def _checkout_worker(app, product_id, hold, counts, lock):
+    # Takes one unit per transaction until the product is sold out, or until
+    # MAX_CHECKOUT_FAILURES checkouts in a row fail for another reason
+    with app.app_context():
+        failures = 0
+        while failures < MAX_CHECKOUT_FAILURES:
+            try:
+                take_stock([(product_id, 1)])
+                time.sleep(hold)
+                db.session.commit()
+            except OutOfStock:
+                db.session.rollback()
+                return
+            except Exception:
+                db.session.rollback()
+                failures += 1
+                with lock:
+                    counts['errors'] += 1
+                time.sleep(0.01 * failures)
+                continue
+            failures = 0
+            with lock:
+                counts['checkouts'] += 1
+        with lock:
+            counts['gave_up'] += 1
+
+
+def sell_out(app, product_id, stock, stripes, threads, hold):
+    # Sets the product's stock to `stock` over `stripes` buckets and sells it
+    # out from `threads` concurrent checkouts that each keep their transaction
+    # open `hold` seconds. Returns the run's counts and whether it oversold.
+    set_stock(product_id, stock, stripes)
+    db.session.commit()
+    db.session.remove()
+
+    counts, lock = {'checkouts': 0, 'errors': 0, 'gave_up': 0}, threading.Lock()
+    workers = [threading.Thread(target=_checkout_worker, args=(app, product_id, hold, counts, lock))
+               for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    remaining = stock_levels([product_id])[product_id][0]
+    negative = db.session.scalar(db.select(db.func.count()).select_from(StockBucket)
+                                 .where(StockBucket.product_id == product_id, StockBucket.quantity < 0))
+    return {
+        'stripes': stripes,
+        'checkouts': counts['checkouts'],
+        'remaining': remaining,
+        'oversold': counts['checkouts'] + remaining != stock or counts['checkouts'] > stock or negative > 0,
+        'errors': counts['errors'],
+        'workers_gave_up': counts['gave_up'],
+        'seconds': round(elapsed, 3),
+        'checkouts_per_second': round(counts['checkouts'] / elapsed, 1) if elapsed else None
+    }
+
+
+@click.command('bench-stock')
+@click.option('--product-id', type=int, default=None, help='Product to use (its stock is restored afterwards).')
+@click.option('--stock', default=2000, show_default=True, help='Units to sell out in each run.')
+@click.option('--threads', default=16, show_default=True)
+@click.option('--stripes', default='1,4,16', show_default=True, help='Stripe counts to compare.')
+@click.option('--hold-ms', default=5, show_default=True,
+              help='How long each checkout keeps its transaction open after taking stock.')
+@with_appcontext
+def bench_stock_command(product_id, stock, threads, stripes, hold_ms):
+    """Sell one product out from many threads per stripe count; check nothing is oversold."""
+    app = current_app._get_current_object()
+    product_id = product_id or db.session.scalar(db.select(db.func.min(Product.id)))
+    if product_id is None:
+        raise click.ClickException('no products, run `flask seed` first')
+    previous = stock_levels([product_id]).get(product_id)
+
+    results = []
+    for count in [int(s) for s in stripes.split(',')]:
+        result = sell_out(app, product_id, stock, count, threads, hold_ms / 1000)
+        results.append(result)
+        click.echo(f"stripes {count:>3}  {result['checkouts_per_second']:>9} checkouts/s  "
+                   f"oversold {result['oversold']}  errors {result['errors']}", err=True)
+
+    set_stock(product_id, previous[0] if previous else None, previous[1] if previous else 1)
+    db.session.commit()
+    click.echo(json.dumps({
+        'database': db.engine.dialect.name,
+        'product_id': product_id,
+        'stock': stock,
+        'threads': threads,
+        'hold_ms': hold_ms,
+        'runs': results
+    }, indent=2))
+    if any(r['oversold'] for r in results):
+        raise SystemExit(1)
@@ -1,14 +1,78 @@
 from flask import Blueprint, request, jsonify
 from app.models.category import Category
+from app.models.category_stats import CategoryStats
+from app.models.product import Product
+from app.query_params import ListQuery, QueryParamError, field_columns, parse_fields
+from app.serializers import serializer
+from app.services.product_bulk import bulk_delete_products, bulk_update_products
 from app.status_codes import *
-from app.extensions import db
+from app.versioning import RowNotFound, VersionConflict, if_match_version, update_values, updated_response, versioned_update
+from app.extensions import db, cache, etags
 
 category_bp = Blueprint('category_bp', __name__, url_prefix='/api/v1/categories')
 
+CATEGORY_FILTERS = {'id': int, 'name': str}
+CATEGORY_FIELDS = ('id', 'name', 'version')
+CATEGORY_UPDATABLE = ('name',)
+
 @category_bp.get('/')
+@etags.conditional('categories')
 def get_all_categories():
-    categories = Category.query.all()
-    return jsonify([{'id': c.id, 'name': c.name} for c in categories]), HTTP_200_OK
+    # Small table: filtered and sorted, but not paginated
+    try:
+        params = ListQuery(Category, CATEGORY_FILTERS, paginate=False)
+        fields = parse_fields(CATEGORY_FIELDS, CATEGORY_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+    def build():
+        categories = db.session.execute(params.apply(db.select(*field_columns(Category, fields)))).all()
+        to_dict = serializer(Category, fields)
+        return [to_dict(c) for c in categories]
+
+    return cache.cached_json(['categories'], build), HTTP_200_OK
+
+@category_bp.get('/summary')
+@etags.conditional('categories', 'products')
+def get_category_summary():
+    # One row per category from category_stats, however many products there are
+    def build():
+        rows = db.session.execute(
+            db.select(Category.id, Category.name, CategoryStats.product_count, CategoryStats.price_sum,
+                      CategoryStats.min_price, CategoryStats.max_price)
+            .outerjoin(CategoryStats, CategoryStats.category_id == Category.id)
+            .order_by(Category.id)
+        ).all()
+        return [{
+            'id': row.id,
+            'name': row.name,
+            'product_count': row.product_count or 0,
+            'min_price': row.min_price,
+            'max_price': row.max_price,
+            'avg_price': round(row.price_sum / row.product_count, 2) if row.product_count else None
+        } for row in rows]
+
+    return cache.cached_json(['categories', 'products'], build), HTTP_200_OK
+
+@category_bp.get('/<int:category_id>')
+def get_category(category_id):
+    try:
+        fields = parse_fields(CATEGORY_FIELDS, CATEGORY_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+    def build():
+        query = db.select(*field_columns(Category, fields)).where(Category.id == category_id)
+        category = db.session.execute(query).first()
+        return serializer(Category, fields)(category) if category else None
+
+    response = cache.cached_json(['categories'], build)
+    category = response.get_json()
+    if category is None:
+        return jsonify({'error': 'Category not found'}), HTTP_404_NOT_FOUND
+    if 'version' in category:
+        response.set_etag(str(category['version']))  # for If-Match on PUT
+    return response, HTTP_200_OK
 
 @category_bp.post('/')
 def create_category():
@@ -23,19 +87,44 @@ def create_category():
 
 @category_bp.put('/<int:category_id>')
 def update_category(category_id):
-    category = Category.query.get(category_id)
-    if not category:
+    # Writes only the supplied fields, in one UPDATE guarded by If-Match
+    try:
+        values = update_values(request.get_json(), CATEGORY_UPDATABLE)
+        expected = if_match_version()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    try:
+        version = versioned_update(Category, category_id, values, expected)
+        db.session.commit()
+    except RowNotFound:
+        db.session.rollback()
         return jsonify({'error': 'Category not found'}), HTTP_404_NOT_FOUND
-    data = request.get_json()
-    category.name = data.get('name', category.name)
-    db.session.commit()
-    return jsonify({'message': 'Category updated successfully'}), HTTP_200_OK
+    except VersionConflict as e:
+        db.session.rollback()
+        return jsonify({'error': 'Category was modified by another request', 'version': e.current}), HTTP_409_CONFLICT
+    return updated_response('Category updated successfully', version), HTTP_200_OK
 
 @category_bp.delete('/<int:category_id>')
 def delete_category(category_id):
-    category = Category.query.get(category_id)
-    if not category:
+    # The category's products are handled first, in chunks: ?products=detach
+    # (default) clears their category_id, ?products=delete deletes them (those
+    # that appear in orders are detached instead)
+    products = request.args.get('products', 'detach')
+    if products not in ('detach', 'delete'):
+        return jsonify({'error': "'products' must be 'detach' or 'delete'"}), HTTP_400_BAD_REQUEST
+    if db.session.scalar(db.select(Category.id).where(Category.id == category_id)) is None:
         return jsonify({'error': 'Category not found'}), HTTP_404_NOT_FOUND
-    db.session.delete(category)
+
+    in_category = [Product.category_id == category_id]
+    summary = {}
+    if products == 'delete':
+        summary['deleted'] = bulk_delete_products(where=in_category)
+    summary['detached'] = bulk_update_products({'category_id': None}, where=in_category)
+    if db.session.scalar(db.select(db.exists().where(*in_category))):
+        # A chunk failed (or products were added meanwhile); keep the category
+        return jsonify({'error': 'Category still has products', 'products': summary}), HTTP_409_CONFLICT
+
+    db.session.execute(db.delete(Category).where(Category.id == category_id))
+    db.session.execute(db.delete(CategoryStats).where(CategoryStats.category_id == category_id))
     db.session.commit()
-    return jsonify({'message': 'Category deleted successfully'}), HTTP_200_OK
\ No newline at end of file
+    return jsonify({'message': 'Category deleted successfully', 'products': summary}), HTTP_200_OK
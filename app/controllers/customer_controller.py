@@ -1,14 +1,67 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from app.models.customer import Customer
+from app.models.order import Order
+from app.query_params import ListQuery, QueryParamError, field_columns, parse_datetime, parse_fields
+from app.serializers import serializer
+from app.services.order_service import ORDER_FIELDS, ORDER_FILTERS, select_orders, serialize_orders
 from app.status_codes import *
-from app.extensions import db
+from app.versioning import RowNotFound, VersionConflict, if_match_version, update_values, updated_response, versioned_update
+from app.extensions import db, etags
 
 customer_bp = Blueprint('customer_bp', __name__, url_prefix='/api/v1/customers')
 
+CUSTOMER_FILTERS = {'id': int, 'name': str, 'email': str, 'created_at': parse_datetime}
+CUSTOMER_FIELDS = ('id', 'name', 'email', 'version')
+CUSTOMER_UPDATABLE = ('name', 'email')
+CUSTOMER_ALLOWED_FIELDS = CUSTOMER_FIELDS + ('created_at',)
+
 @customer_bp.get('/')
+@etags.conditional('customers')
 def get_all_customers():
-    customers = Customer.query.all()
-    return jsonify([{'id': c.id, 'name': c.name, 'email': c.email} for c in customers]), HTTP_200_OK
+    try:
+        params = ListQuery(Customer, CUSTOMER_FILTERS)
+        fields = parse_fields(CUSTOMER_ALLOWED_FIELDS, CUSTOMER_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    query = params.apply(db.select(*field_columns(Customer, fields)))
+    customers, next_cursor = params.page(db.session.execute(query).all())
+    to_dict = serializer(Customer, fields)
+    return jsonify({
+        'customers': [to_dict(c) for c in customers],
+        'next': next_cursor
+    }), HTTP_200_OK
+
+@customer_bp.get('/<int:customer_id>')
+def get_customer(customer_id):
+    try:
+        fields = parse_fields(CUSTOMER_ALLOWED_FIELDS, CUSTOMER_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    customer = db.session.execute(db.select(*field_columns(Customer, fields)).where(Customer.id == customer_id)).first()
+    if not customer:
+        return jsonify({'error': 'Customer not found'}), HTTP_404_NOT_FOUND
+    response = jsonify(serializer(Customer, fields)(customer))
+    if 'version' in fields:
+        response.set_etag(str(customer.version))  # for If-Match on PUT
+    return response, HTTP_200_OK
+
+@customer_bp.get('/<int:customer_id>/orders')
+def get_customer_orders(customer_id):
+    try:
+        params = ListQuery(Order, ORDER_FILTERS)
+        fields = parse_fields(ORDER_FIELDS, ORDER_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    if db.session.scalar(db.select(Customer.id).where(Customer.id == customer_id)) is None:
+        return jsonify({'error': 'Customer not found'}), HTTP_404_NOT_FOUND
+
+    query = params.apply(select_orders(fields).where(Order.customer_id == customer_id))
+    orders, next_cursor = params.page(db.session.execute(query).all())
+    return jsonify({
+        'orders': serialize_orders(orders, fields),
+        'next': next_cursor
+    }), HTTP_200_OK
 
 @customer_bp.post('/')
 def create_customer():
@@ -23,14 +76,25 @@ def create_customer():
 
 @customer_bp.put('/<int:customer_id>')
 def update_customer(customer_id):
-    customer = Customer.query.get(customer_id)
-    if not customer:
+    # Writes only the supplied fields, in one UPDATE guarded by If-Match
+    try:
+        values = update_values(request.get_json(), CUSTOMER_UPDATABLE)
+        expected = if_match_version()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    try:
+        version = versioned_update(Customer, customer_id, values, expected)
+        db.session.commit()
+    except RowNotFound:
+        db.session.rollback()
         return jsonify({'error': 'Customer not found'}), HTTP_404_NOT_FOUND
-    data = request.get_json()
-    customer.name = data.get('name', customer.name)
-    customer.email = data.get('email', customer.email)
-    db.session.commit()
-    return jsonify({'message': 'Customer updated successfully'}), HTTP_200_OK
+    except VersionConflict as e:
+        db.session.rollback()
+        return jsonify({'error': 'Customer was modified by another request', 'version': e.current}), HTTP_409_CONFLICT
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e.orig)}), HTTP_409_CONFLICT
+    return updated_response('Customer updated successfully', version), HTTP_200_OK
 
 @customer_bp.delete('/<int:customer_id>')
 def delete_customer(customer_id):
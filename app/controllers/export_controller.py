@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy import and_, or_
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.status_codes import *
+from app.extensions import db, replicas
+
+export_bp = Blueprint('export_bp', __name__, url_prefix='/api/v1/export')
+
+EXPORTABLE_TABLES = {
+    'customers': Customer.__table__,
+    'orders': Order.__table__,
+    'order_items': OrderItem.__table__,
+}
+EXPORT_CHUNK_SIZE = 5000
+STREAM_BATCH_SIZE = 1000
+
+
+def _parse_datetime(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date or datetime")
+
+
+def _export_value(value):
+    # Datetimes as ISO 8601 in both formats, so a CSV and an NDJSON export of
+    # the same rows agree
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_rows(engine, table, since, until):
+    # Reads the table in keyset chunks. Each chunk runs on its own short-lived
+    # connection with a server-side cursor, so no transaction or snapshot is
+    # held for the whole export and concurrent writers are never blocked.
+    # With a created_at window the keyset is (created_at, id), which follows
+    # the created_at index; otherwise it is the primary key.
+    ranged = since is not None or until is not None
+    filters = []
+    if since is not None:
+        filters.append(table.c.created_at >= since)
+    if until is not None:
+        filters.append(table.c.created_at < until)
+    order_by = (table.c.created_at, table.c.id) if ranged else (table.c.id,)
+
+    last = None
+    while True:
+        query = db.select(table).where(*filters).order_by(*order_by).limit(EXPORT_CHUNK_SIZE)
+        if last is not None:
+            if ranged:
+                query = query.where(or_(table.c.created_at > last.created_at,
+                                        and_(table.c.created_at == last.created_at, table.c.id > last.id)))
+            else:
+                query = query.where(table.c.id > last.id)
+
+        count = 0
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE).execute(query)
+            for rows in result.partitions():
+                count += len(rows)
+                last = rows[-1]
+                yield rows
+        if count < EXPORT_CHUNK_SIZE:
+            return
+
+
+def encode_ndjson(columns, batches):
+    for rows in batches:
+        yield ''.join(json.dumps({c: _export_value(v) for c, v in zip(columns, row)}) + '\n' for row in rows)
+
+
+def encode_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([_export_value(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_stream(chunks):
+    # Compresses as the stream is written; only the zlib window is kept in memory
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@export_bp.get('/<table_name>')
+def export_table(table_name):
+    table = EXPORTABLE_TABLES.get(table_name)
+    if table is None:
+        return jsonify({'error': f"Unknown table, expected one of {sorted(EXPORTABLE_TABLES)}"}), HTTP_404_NOT_FOUND
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': "'format' must be 'ndjson' or 'csv'"}), HTTP_400_BAD_REQUEST
+    try:
+        since, until = _parse_datetime('from'), _parse_datetime('to')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+    columns = [c.name for c in table.columns]
+    # Long scans belong on a replica when there is one
+    batches = export_rows(replicas.read_engine() or db.engine, table, since, until)
+    body = encode_csv(columns, batches) if fmt == 'csv' else encode_ndjson(columns, batches)
+    filename = f'{table_name}.{fmt}'
+    if request.args.get('gzip') in ('1', 'true'):
+        # A .gz file to keep as is: the client must not decode it on the way
+        response = Response(gzip_stream(body), mimetype='application/gzip')
+        filename += '.gz'
+    else:
+        response = Response(body, mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson')
+        if 'gzip' in request.accept_encodings:
+            # Compressed in transit only; the client saves the decoded file
+            response.response = gzip_stream(body)
+            response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
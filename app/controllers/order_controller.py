@@ -1,28 +1,92 @@
 from flask import Blueprint, request, jsonify
 from app.models.order import Order
-from app.models.order_item import OrderItem
+from app.query_params import ListQuery, QueryParamError, parse_fields
+from app.services.order_service import (
+    MAX_BATCH_ORDERS, ORDER_FIELDS, ORDER_FILTERS, OrderConflictError, OrderValidationError, create_orders,
+    select_orders, serialize_orders, validate_orders
+)
+from app.order_intake import QueueFull
 from app.status_codes import *
-from app.extensions import db
+from app.extensions import db, idempotency, order_intake
 
 order_bp = Blueprint('order_bp', __name__, url_prefix='/api/v1/orders')
 
+@order_bp.get('/')
+def get_all_orders():
+    try:
+        params = ListQuery(Order, ORDER_FILTERS)
+        fields = parse_fields(ORDER_FIELDS, ORDER_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    orders, next_cursor = params.page(db.session.execute(params.apply(select_orders(fields))).all())
+    return jsonify({
+        'orders': serialize_orders(orders, fields),
+        'next': next_cursor
+    }), HTTP_200_OK
+
+@order_bp.get('/<int:order_id>')
+def get_order(order_id):
+    try:
+        fields = parse_fields(ORDER_FIELDS, ORDER_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    order = db.session.execute(select_orders(fields).where(Order.id == order_id)).first()
+    if not order:
+        return jsonify({'error': 'Order not found'}), HTTP_404_NOT_FOUND
+    return jsonify(serialize_orders([order], fields)[0]), HTTP_200_OK
+
 @order_bp.post('/')
+@idempotency.idempotent
 def create_order():
     data = request.get_json()
+    if order_intake.enabled:
+        return enqueue_order(data)
     try:
-        customer_id = data['customer_id']
-        items = data['items']  # List of dicts with product_id and quantity
-
-        new_order = Order(customer_id=customer_id)
-        db.session.add(new_order)
-        db.session.flush()
-
-        for item in items:
-            order_item = OrderItem(order_id=new_order.id, product_id=item['product_id'], quantity=item['quantity'])
-            db.session.add(order_item)
+        order_ids = create_orders([data])
+        return jsonify({'message': 'Order created successfully', 'order_id': order_ids[0]}), HTTP_201_CREATED
+    except OrderConflictError as e:
+        return jsonify({'error': e.errors[0]['error']}), HTTP_409_CONFLICT
+    except OrderValidationError as e:
+        return jsonify({'error': e.errors[0]['error']}), HTTP_400_BAD_REQUEST
+    except Exception as e:
+        return jsonify({'error': str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
-        db.session.commit()
-        return jsonify({'message': 'Order created successfully', 'order_id': new_order.id}), HTTP_201_CREATED
+@order_bp.post('/batch')
+def create_order_batch():
+    data = request.get_json()
+    orders = data.get('orders') if isinstance(data, dict) else None
+    if not isinstance(orders, list) or not orders:
+        return jsonify({'error': "'orders' must be a non-empty list"}), HTTP_400_BAD_REQUEST
+    if len(orders) > MAX_BATCH_ORDERS:
+        return jsonify({'error': f'at most {MAX_BATCH_ORDERS} orders per batch'}), HTTP_400_BAD_REQUEST
+    try:
+        order_ids = create_orders(orders)
+        return jsonify({'message': 'Orders created successfully', 'order_ids': order_ids}), HTTP_201_CREATED
+    except OrderConflictError as e:
+        return jsonify({'errors': e.errors}), HTTP_409_CONFLICT
+    except OrderValidationError as e:
+        return jsonify({'errors': e.errors}), HTTP_400_BAD_REQUEST
     except Exception as e:
         return jsonify({'error': str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+def enqueue_order(data):
+    # Async intake: validate now, write later; the ticket reports the outcome
+    errors = validate_orders([data])
+    if errors:
+        return jsonify({'error': errors[0]['error']}), HTTP_400_BAD_REQUEST
+    try:
+        ticket = order_intake.submit(data)
+    except QueueFull:
+        response = jsonify({'error': 'Order intake is full, retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, HTTP_503_SERVICE_UNAVAILABLE
+    response = jsonify({'message': 'Order accepted', 'ticket': ticket, 'status': 'queued'})
+    response.headers['Location'] = f'/api/v1/orders/tickets/{ticket}'
+    return response, HTTP_202_ACCEPTED
+
+@order_bp.get('/tickets/<ticket>')
+def get_order_ticket(ticket):
+    status = order_intake.status(ticket)
+    if status is None:
+        return jsonify({'error': 'Ticket not found'}), HTTP_404_NOT_FOUND
+    return jsonify({'ticket': ticket, **status}), HTTP_200_OK
@@ -1,20 +1,167 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy.exc import IntegrityError
+from app.models.category_stats import refresh_category_stats
 from app.models.product import Product
+from app.pagination import PaginationError, get_page_args, wants_stream
+from app.query_params import ListQuery, QueryParamError, field_columns, parse_datetime, parse_fields
+from app.leaderboard import WINDOWS, LeaderboardLoading
+from app.search import SearchError, search_products
+from app.serializers import serializer
+from app.services.product_bulk import (BulkError, DEFAULT_CHUNK_SIZE as BULK_CHUNK_SIZE, MAX_CHUNK_SIZE as MAX_BULK_CHUNK_SIZE,
+                                       bulk_delete_products, bulk_update_products, clean_values, parse_ids)
+from app.services.product_changes import parse_since, product_changes
+from app.services.product_import import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, import_products
 from app.status_codes import *
-from app.extensions import db
+from app.versioning import RowNotFound, VersionConflict, if_match_version, update_values, updated_response, versioned_update
+from app.extensions import db, cache, etags, leaderboard
 
 product_bp = Blueprint('product_bp', __name__, url_prefix='/api/v1/products')
 
+STREAM_BATCH_SIZE = 1000
+
+# Reads select only the requested columns (?fields=), never full entities, so
+# large listings stay out of the ORM identity map
+PRODUCT_FIELDS = ('id', 'name', 'price', 'description', 'category_id', 'sku', 'version')
+PRODUCT_ALLOWED_FIELDS = PRODUCT_FIELDS + ('created_at', 'updated_at')
+PRODUCT_UPDATABLE = ('name', 'price', 'description', 'category_id', 'sku')
+
+PRODUCT_FILTERS = {
+    'id': int,
+    'name': str,
+    'price': float,
+    'category_id': int,
+    'sku': str,
+    'created_at': parse_datetime,
+    'updated_at': parse_datetime
+}
+
 @product_bp.get('/')
+@etags.conditional('products')
 def get_all_products():
-    products = Product.query.all()
-    return jsonify([{
-        'id': p.id,
-        'name': p.name,
-        'price': p.price,
-        'description': p.description,
-        'category_id': p.category_id
-    } for p in products]), HTTP_200_OK
+    stream = wants_stream()
+    try:
+        params = ListQuery(Product, PRODUCT_FILTERS, paginate=not stream)
+        fields = parse_fields(PRODUCT_ALLOWED_FIELDS, PRODUCT_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+    query = params.apply(db.select(*field_columns(Product, fields)))
+    if stream:
+        return stream_products(query, fields)
+
+    def build():
+        rows, next_cursor = params.page(db.session.execute(query).all())
+        to_dict = serializer(Product, fields)
+        return {'products': [to_dict(p) for p in rows], 'next': next_cursor}
+
+    return cache.cached_json(['products'], build), HTTP_200_OK
+
+@product_bp.get('/search')
+def search_product_catalog():
+    q = request.args.get('q', '')
+    try:
+        limit, _ = get_page_args()
+        offset = int(request.args.get('offset', 0))
+        category_id = request.args.get('category_id', type=int)
+        fields = parse_fields(PRODUCT_ALLOWED_FIELDS, PRODUCT_FIELDS)
+    except (PaginationError, QueryParamError, ValueError) as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    if offset < 0:
+        return jsonify({'error': "'offset' must not be negative"}), HTTP_400_BAD_REQUEST
+
+    def build():
+        rows = search_products(field_columns(Product, fields), q, category_id, limit + 1, offset)
+        to_dict = serializer(Product, fields)
+        return {
+            'products': [dict(to_dict(p), score=round(p.score, 6)) for p in rows[:limit]],
+            'next_offset': offset + limit if len(rows) > limit else None
+        }
+
+    try:
+        return cache.cached_json(['products'], build), HTTP_200_OK
+    except SearchError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+@product_bp.get('/changes')
+def get_product_changes():
+    # Incremental sync: start without `since`, then pass back `next` each time
+    try:
+        limit, _ = get_page_args()
+        since = parse_since(request.args.get('since'))
+        fields = parse_fields(PRODUCT_ALLOWED_FIELDS, PRODUCT_FIELDS)
+    except (PaginationError, QueryParamError) as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    return jsonify(product_changes(since, limit, fields)), HTTP_200_OK
+
+@product_bp.get('/top')
+def get_top_products():
+    # Top sellers by units from the in-memory leaderboard, e.g. ?n=10&category_id=3&window=day
+    window = request.args.get('window', 'all')
+    if window not in WINDOWS:
+        return jsonify({'error': f"'window' must be one of {', '.join(WINDOWS)}"}), HTTP_400_BAD_REQUEST
+    try:
+        n = int(request.args.get('n', 10))
+        category_id = request.args.get('category_id')
+        category_id = int(category_id) if category_id is not None else None
+    except ValueError:
+        return jsonify({'error': "'n' and 'category_id' must be integers"}), HTTP_400_BAD_REQUEST
+    if not 1 <= n <= leaderboard.k:
+        return jsonify({'error': f"'n' must be between 1 and {leaderboard.k}"}), HTTP_400_BAD_REQUEST
+
+    try:
+        top = leaderboard.top(window, category_id, n)
+    except LeaderboardLoading:
+        response = jsonify({'error': 'The leaderboard is loading, retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, HTTP_503_SERVICE_UNAVAILABLE
+    names = dict(db.session.execute(
+        db.select(Product.id, Product.name).where(Product.id.in_([product_id for product_id, _ in top]))
+    ).all()) if top else {}
+    return jsonify({
+        'window': window,
+        'category_id': category_id,
+        'products': [{'product_id': product_id, 'name': names.get(product_id), 'units': units}
+                     for product_id, units in top],
+        'reconciled_at': leaderboard.loaded_at.isoformat()
+    }), HTTP_200_OK
+
+@product_bp.get('/<int:product_id>')
+def get_product(product_id):
+    try:
+        fields = parse_fields(PRODUCT_ALLOWED_FIELDS, PRODUCT_FIELDS)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+    def build():
+        query = db.select(*field_columns(Product, fields)).where(Product.id == product_id)
+        row = db.session.execute(query).first()
+        return serializer(Product, fields)(row) if row else None
+
+    response = cache.cached_json(['products'], build)
+    product = response.get_json()
+    if product is None:
+        return jsonify({'error': 'Product not found'}), HTTP_404_NOT_FOUND
+    if 'version' in product:
+        response.set_etag(str(product['version']))  # for If-Match on PUT
+    return response, HTTP_200_OK
+
+def stream_products(query, fields):
+    # Write the JSON array batch by batch from a server-side cursor so memory
+    # stays flat regardless of the table size.
+    result = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+    dumps = current_app.json.dumps
+    to_dict = serializer(Product, fields)
+
+    def generate():
+        yield '['
+        first = True
+        for rows in result.partitions():
+            chunk = ','.join(dumps(to_dict(p)) for p in rows)
+            yield chunk if first else ',' + chunk
+            first = False
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @product_bp.post('/')
 def create_product():
@@ -24,7 +171,8 @@ def create_product():
             name=data['name'],
             price=data['price'],
             description=data.get('description'),
-            category_id=data['category_id']
+            category_id=data['category_id'],
+            sku=data.get('sku')
         )
         db.session.add(new_product)
         db.session.commit()
@@ -32,18 +180,105 @@ def create_product():
     except Exception as e:
         return jsonify({'error': str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+@product_bp.post('/import')
+def import_product_feed():
+    # Body is NDJSON (one product per line) or CSV with a header row
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': "'format' must be 'ndjson' or 'csv'"}), HTTP_400_BAD_REQUEST
+    try:
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({'error': "'chunk_size' must be an integer"}), HTTP_400_BAD_REQUEST
+    if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+        return jsonify({'error': f"'chunk_size' must be between 1 and {MAX_CHUNK_SIZE}"}), HTTP_400_BAD_REQUEST
+    do_upsert = request.args.get('upsert', '').lower() in ('1', 'true', 'yes')
+
+    summary = import_products(request.stream, fmt, chunk_size, do_upsert)
+    return jsonify(summary), HTTP_200_OK
+
+def bulk_selection():
+    # (ids, filters, chunk_size) of a bulk request: `ids` from the JSON body
+    # and/or the list endpoint's filters from the query string
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        raise BulkError('Request body must be a JSON object')
+    ids = parse_ids(data.get('ids'))
+    try:
+        where = ListQuery(Product, PRODUCT_FILTERS, paginate=False).filters
+    except QueryParamError as e:
+        raise BulkError(str(e))
+    if ids is None and not where:
+        raise BulkError("Select products with 'ids' in the body or filters in the query string")
+    try:
+        chunk_size = int(request.args.get('chunk_size', BULK_CHUNK_SIZE))
+    except ValueError:
+        raise BulkError("'chunk_size' must be an integer")
+    if not 1 <= chunk_size <= MAX_BULK_CHUNK_SIZE:
+        raise BulkError(f"'chunk_size' must be between 1 and {MAX_BULK_CHUNK_SIZE}")
+    return data, ids, where, chunk_size
+
+@product_bp.patch('/bulk')
+def bulk_update():
+    # e.g. PATCH /bulk?category_id=3 {"price_factor": 1.05}
+    #      PATCH /bulk {"ids": [1, 2, 3], "set": {"category_id": 4}}
+    try:
+        data, ids, where, chunk_size = bulk_selection()
+        values = clean_values(data.get('set'), data.get('price_factor'))
+    except BulkError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    summary = bulk_update_products(values, data.get('price_factor'), ids, where, chunk_size)
+    return jsonify(summary), HTTP_200_OK
+
+@product_bp.delete('/bulk')
+def bulk_delete():
+    # e.g. DELETE /bulk?category_id=3 or DELETE /bulk {"ids": [1, 2, 3]}.
+    # Products that appear in orders are kept.
+    try:
+        _, ids, where, chunk_size = bulk_selection()
+    except BulkError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    return jsonify(bulk_delete_products(ids, where, chunk_size)), HTTP_200_OK
+
 @product_bp.put('/<int:product_id>')
 def update_product(product_id):
-    product = Product.query.get(product_id)
-    if not product:
+    # Writes only the supplied fields, in one UPDATE guarded by If-Match
+    try:
+        values = update_values(request.get_json(), PRODUCT_UPDATABLE)
+        expected = if_match_version()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    try:
+        moved_from = None
+        if 'category_id' in values:
+            # The UPDATE cannot report the category a product leaves; moves are
+            # rare, repricing is not
+            moved_from = db.session.scalar(db.select(Product.category_id).where(Product.id == product_id))
+        version = versioned_update(Product, product_id, values, expected)
+        db.session.commit()
+    except RowNotFound:
+        db.session.rollback()
         return jsonify({'error': 'Product not found'}), HTTP_404_NOT_FOUND
-    data = request.get_json()
-    product.name = data.get('name', product.name)
-    product.price = data.get('price', product.price)
-    product.description = data.get('description', product.description)
-    product.category_id = data.get('category_id', product.category_id)
-    db.session.commit()
-    return jsonify({'message': 'Product updated successfully'}), HTTP_200_OK
+    except VersionConflict as e:
+        db.session.rollback()
+        return jsonify({'error': 'Product was modified by another request', 'version': e.current}), HTTP_409_CONFLICT
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e.orig)}), HTTP_409_CONFLICT
+    if 'price' in values or 'category_id' in values:
+        # category_stats is recomputed for the affected categories after the
+        # commit, in its own transaction, so the write itself stays one UPDATE
+        if 'category_id' in values:
+            affected = {c for c in (moved_from, values['category_id']) if c is not None}
+        else:
+            affected = db.select(Product.category_id).where(Product.id == product_id)
+        try:
+            refresh_category_stats(db.session.connection(), affected)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('could not refresh category stats after updating product %s', product_id)
+    return updated_response('Product updated successfully', version), HTTP_200_OK
 
 @product_bp.delete('/<int:product_id>')
 def delete_product(product_id):
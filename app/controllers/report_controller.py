@@ -0,0 +1,23 @@
+from flask import Blueprint, request, jsonify
+from app.pagination import PaginationError, get_page_args
+from app.services.sales_rollup import REPORT_GROUPS, ReportError, parse_day, sales_report
+from app.status_codes import *
+from app.extensions import cache
+
+report_bp = Blueprint('report_bp', __name__, url_prefix='/api/v1/reports')
+
+@report_bp.get('/sales')
+def get_sales_report():
+    # Served from the sales rollups; run `flask rollup-sales` to bring them up to date
+    try:
+        limit, _ = get_page_args()
+        since = parse_day('from', request.args.get('from'))
+        until = parse_day('to', request.args.get('to'))
+        group_by = request.args.get('group_by', 'day')
+        if group_by not in REPORT_GROUPS:
+            raise ReportError(f"'group_by' must be one of {list(REPORT_GROUPS)}")
+    except (PaginationError, ReportError) as e:
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+
+    tables = ['sales_daily', 'sales_daily_product', 'sales_daily_category']
+    return cache.cached_json(tables, lambda: sales_report(since, until, group_by, limit)), HTTP_200_OK
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify
+from app.status_codes import *
+from app.extensions import cache, leaderboard, order_intake, pool_monitor, replicas
+
+stats_bp = Blueprint('stats_bp', __name__, url_prefix='/api/v1/stats')
+
+@stats_bp.get('/cache')
+def get_cache_stats():
+    return jsonify(cache.stats()), HTTP_200_OK
+
+@stats_bp.get('/pool')
+def get_pool_stats():
+    return jsonify(pool_monitor.snapshot()), HTTP_200_OK
+
+@stats_bp.get('/intake')
+def get_intake_stats():
+    return jsonify(order_intake.stats()), HTTP_200_OK
+
+@stats_bp.get('/replicas')
+def get_replica_stats():
+    return jsonify(replicas.snapshot()), HTTP_200_OK
+
+@stats_bp.get('/leaderboard')
+def get_leaderboard_stats():
+    return jsonify(leaderboard.stats()), HTTP_200_OK
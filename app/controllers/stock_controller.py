@@ -0,0 +1,72 @@
+from flask import Blueprint, request, jsonify
+from app.models.product import Product
+from app.services.inventory import (
+    DEFAULT_RESERVATION_TTL, MAX_RESERVATION_TTL, MAX_STRIPES, OutOfStock, ReservationError, release_reservation,
+    reserve, set_stock, stock_levels
+)
+from app.status_codes import *
+from app.extensions import db
+
+stock_bp = Blueprint('stock_bp', __name__, url_prefix='/api/v1/stock')
+
+def _is_count(value, minimum=0):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+@stock_bp.get('/<int:product_id>')
+def get_stock(product_id):
+    if db.session.scalar(db.select(Product.id).where(Product.id == product_id)) is None:
+        return jsonify({'error': 'Product not found'}), HTTP_404_NOT_FOUND
+    level = stock_levels([product_id]).get(product_id)
+    return jsonify({
+        'product_id': product_id,
+        'tracked': level is not None,
+        'available': level[0] if level else None,
+        'stripes': level[1] if level else None
+    }), HTTP_200_OK
+
+@stock_bp.put('/<int:product_id>')
+def update_stock(product_id):
+    # {"quantity": 500, "stripes": 8}; "quantity": null stops tracking stock
+    data = request.get_json()
+    quantity = data.get('quantity') if isinstance(data, dict) else None
+    stripes = data.get('stripes', 1) if isinstance(data, dict) else None
+    if not isinstance(data, dict) or 'quantity' not in data or not (quantity is None or _is_count(quantity)):
+        return jsonify({'error': "'quantity' must be a non-negative integer or null"}), HTTP_400_BAD_REQUEST
+    if not _is_count(stripes, 1) or stripes > MAX_STRIPES:
+        return jsonify({'error': f"'stripes' must be between 1 and {MAX_STRIPES}"}), HTTP_400_BAD_REQUEST
+    if db.session.scalar(db.select(Product.id).where(Product.id == product_id)) is None:
+        return jsonify({'error': 'Product not found'}), HTTP_404_NOT_FOUND
+    set_stock(product_id, quantity, stripes)
+    db.session.commit()
+    return jsonify({'message': 'Stock updated successfully'}), HTTP_200_OK
+
+@stock_bp.post('/reservations')
+def create_reservation():
+    # {"items": [{"product_id": 1, "quantity": 2}], "ttl_seconds": 600}
+    data = request.get_json()
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items or not all(
+        isinstance(i, dict) and _is_count(i.get('product_id'), 1) and _is_count(i.get('quantity'), 1) for i in items
+    ):
+        return jsonify({'error': "'items' must be a non-empty list of {product_id, quantity}"}), HTTP_400_BAD_REQUEST
+    ttl = data.get('ttl_seconds', DEFAULT_RESERVATION_TTL)
+    if not _is_count(ttl, 1) or ttl > MAX_RESERVATION_TTL:
+        return jsonify({'error': f"'ttl_seconds' must be between 1 and {MAX_RESERVATION_TTL}"}), HTTP_400_BAD_REQUEST
+    try:
+        reservation_id, expires_at = reserve([(i['product_id'], i['quantity']) for i in items], ttl)
+        db.session.commit()
+    except OutOfStock as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), HTTP_409_CONFLICT
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), HTTP_400_BAD_REQUEST
+    return jsonify({'reservation_id': reservation_id, 'expires_at': expires_at.isoformat()}), HTTP_201_CREATED
+
+@stock_bp.delete('/reservations/<reservation_id>')
+def cancel_reservation(reservation_id):
+    released = release_reservation(reservation_id)
+    db.session.commit()
+    if not released:
+        return jsonify({'error': 'Reservation not found'}), HTTP_404_NOT_FOUND
+    return jsonify({'message': 'Reservation released', 'released': released}), HTTP_200_OK
@@ -0,0 +1,62 @@
+from sqlalchemy import event
+
+# Collects the names of the tables written in the current transaction, from
+# ORM flushes and from ORM-enabled INSERT/UPDATE/DELETE statements. Write
+# listeners are told, inside the transaction, the first time a table is
+# written; commit listeners get the whole set once the transaction commits.
+
+_CHANGED_TABLES = 'changed_tables'
+_write_listeners = []
+_commit_listeners = []
+
+
+def _changed_tables(session):
+    return session.info.setdefault(_CHANGED_TABLES, set())
+
+
+def _record(session, written):
+    tables = _changed_tables(session)
+    new_tables = written - tables
+    if new_tables:
+        tables.update(new_tables)
+        for listener in _write_listeners:
+            listener(session, new_tables)
+
+
+def _after_flush(session, flush_context):
+    _record(session, {obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)})
+
+
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _record(orm_execute_state.session, {orm_execute_state.statement.table.name})
+
+
+def _after_commit(session):
+    tables = session.info.pop(_CHANGED_TABLES, None)
+    if tables:
+        for listener in _commit_listeners:
+            listener(tables)
+
+
+def _after_rollback(session):
+    session.info.pop(_CHANGED_TABLES, None)
+
+
+def track_changes(session):
+    for name, fn in (('after_flush', _after_flush), ('do_orm_execute', _do_orm_execute),
+                     ('after_commit', _after_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(session, name, fn):
+            event.listen(session, name, fn)
+
+
+def on_write(listener):
+    # listener(session, tables) runs inside the transaction, before the writes are committed
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def on_commit(listener):
+    # listener(tables) is called with the set of table names written by a committed transaction
+    if listener not in _commit_listeners:
+        _commit_listeners.append(listener)
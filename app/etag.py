@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import threading
+from functools import wraps
+
+from flask import make_response, request
+
+from app.db_events import on_commit, track_changes
+from app.status_codes import *
+from app.upsert import upsert
+
+log = logging.getLogger(__name__)
+
+# Tables whose collection endpoints answer conditional GETs
+VERSIONED_TABLES = ('products', 'categories', 'customers')
+
+
+class ETags:
+    """ETag / If-None-Match support driven by per-table version counters.
+
+    Once a transaction that wrote a versioned table commits, its row in
+    `table_versions` is bumped in a short transaction of its own, so a GET
+    can be validated with one primary key lookup instead of loading and
+    serializing the collection. The counter lives in the database, so all
+    worker processes agree on it, and is read from the primary: a lagging
+    replica would validate stale bodies. Bumping after the commit keeps
+    writers from queueing on the shared counter row; a GET racing the commit
+    may tag the new body with the old version, which only costs the client
+    one extra refetch once the bump lands. When a bump fails, GETs of those
+    tables get no ETag (so no 304) until a retry of the bump succeeds.
+    """
+
+    def __init__(self):
+        self._unbumped = set()  # tables whose last bump failed
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        track_changes(db.session)
+        on_commit(self.bump)
+
+    def _write(self, names):
+        from app.extensions import db
+        from app.models.table_version import TableVersion
+
+        table = TableVersion.__table__
+        with db.engine.begin() as conn:
+            conn.execute(upsert(conn.dialect.name, table, ['table_name'], lambda new: {
+                'version': table.c.version + 1,
+            }), [{'table_name': name, 'version': 1} for name in names])
+
+    def bump(self, tables):
+        names = sorted(set(tables).intersection(VERSIONED_TABLES))
+        if not names:
+            return
+        try:
+            self._write(names)
+        except Exception:
+            log.exception('could not bump table versions for %s', ', '.join(names))
+            with self._lock:
+                self._unbumped.update(names)
+            return
+        with self._lock:
+            self._unbumped.difference_update(names)
+
+    def current(self, tables):
+        # The tag of the requested URL at the tables' current versions, or
+        # None while a failed bump leaves them untrustworthy
+        from app.extensions import db
+        from app.models.table_version import TableVersion
+
+        if self._unbumped.intersection(tables):
+            with self._lock:
+                pending = sorted(self._unbumped.intersection(tables))
+            self.bump(pending)
+            if self._unbumped.intersection(tables):
+                return None
+        rows = db.session.execute(
+            db.select(TableVersion.table_name, TableVersion.version)
+            .where(TableVersion.table_name.in_(tables))
+            .order_by(TableVersion.table_name),
+            bind_arguments={'bind': db.engine}
+        ).all()
+        # The URL is part of the tag: each page and filter has its own body.
+        raw = request.full_path + '|' + ','.join(f'{name}:{version}' for name, version in rows)
+        return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+    def conditional(self, *tables):
+        # Decorator for GET views: answers 304 when the client's ETag is current.
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                etag = self.current(tables)
+                if etag is not None and etag in request.if_none_match:
+                    response = make_response('', HTTP_304_NOT_MODIFIED)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != HTTP_200_OK or etag is None:
+                        return response
+                response.set_etag(etag)
+                return response
+            return wrapper
+        return decorator
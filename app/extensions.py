@@ -1,9 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from app.cache import Cache
+from app.etag import ETags
+from app.pool import PoolMonitor
+from app.metrics import Metrics
+from app.order_intake import OrderIntake
+from app.idempotency import Idempotency
+from app.leaderboard import Leaderboard
+from app.replicas import Replicas, RoutingSession
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
+cache = Cache()
+etags = ETags()
+pool_monitor = PoolMonitor()
+metrics = Metrics()
+order_intake = OrderIntake()
+idempotency = Idempotency()
+replicas = Replicas()
+leaderboard = Leaderboard()
 
 
 
@@ -0,0 +1,173 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+
+from app.cache import TTLCache
+from app.status_codes import *
+
+MAX_KEY_LENGTH = 255
+
+
+class Idempotency:
+    """Idempotency-Key support for POST endpoints.
+
+    The first request with a key claims it with a row in `idempotency_keys`,
+    runs the view and stores the response in that row. A retry with the same
+    key gets the stored response back without running the view; recent keys
+    are also kept in memory, so most retries do not touch the database at all.
+    Requests with a key that is still running in this process wait for it
+    rather than racing it; across processes the claim row makes the loser
+    answer 409. A claim is a lease of IDEMPOTENCY_LEASE_SECONDS: if the
+    process running it dies before storing a response, a retry after the
+    lease runs out takes the key over instead of getting 409 until the key
+    expires. The lease must outlast the slowest request. Keys expire after
+    IDEMPOTENCY_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self.responses = TTLCache()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400)
+        self.wait = app.config.get('IDEMPOTENCY_WAIT_SECONDS', 10)
+        self.lease = app.config.get('IDEMPOTENCY_LEASE_SECONDS', 60)
+        self.responses.max_entries = app.config.get('IDEMPOTENCY_CACHE_ENTRIES', 10000)
+        self.responses.ttl = min(self.ttl, app.config.get('IDEMPOTENCY_CACHE_TTL_SECONDS', 3600))
+
+    def _replay(self, stored, request_hash):
+        stored_hash, status_code, body = stored
+        if stored_hash != request_hash:
+            return jsonify({'error': 'Idempotency-Key was already used with a different request'}), \
+                HTTP_422_UNPROCESSABLE_ENTITY
+        response = Response(body, status=status_code, mimetype='application/json')
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def _in_progress(self):
+        response = jsonify({'error': 'A request with this Idempotency-Key is still in progress'})
+        response.headers['Retry-After'] = '1'
+        return response, HTTP_409_CONFLICT
+
+    def _claim(self, key_hash, request_hash):
+        # Returns the stored (request_hash, status_code, body) of a finished
+        # request, 'busy' when another process holds the key's lease, or None
+        # once this request owns it
+        from app.extensions import db
+        from app.models.idempotency_key import IdempotencyKey
+
+        now = datetime.now()
+        row = db.session.get(IdempotencyKey, key_hash)
+        if row is not None and row.expires_at <= now:
+            db.session.delete(row)
+            db.session.flush()
+            row = None
+        if row is None:
+            db.session.add(IdempotencyKey(key_hash=key_hash, request_hash=request_hash,
+                                          locked_until=now + timedelta(seconds=self.lease),
+                                          expires_at=now + timedelta(seconds=self.ttl)))
+            try:
+                db.session.commit()
+                return None
+            except IntegrityError:
+                db.session.rollback()
+                row = db.session.get(IdempotencyKey, key_hash)
+                if row is None:
+                    return 'busy'
+        if row.status_code is None:
+            if row.locked_until is not None and row.locked_until > now:
+                return 'busy'
+            # The lease ran out without a response: its owner died, take over
+            taken = db.session.execute(
+                db.update(IdempotencyKey)
+                .where(IdempotencyKey.key_hash == key_hash, IdempotencyKey.status_code.is_(None),
+                       IdempotencyKey.locked_until == row.locked_until)
+                .values(request_hash=request_hash, locked_until=now + timedelta(seconds=self.lease))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            return None if taken else 'busy'
+        stored = (row.request_hash, row.status_code, row.body)
+        self.responses.set(key_hash, stored)
+        return stored
+
+    def _finish(self, key_hash, request_hash, response):
+        from app.extensions import db
+        from app.models.idempotency_key import IdempotencyKey
+
+        db.session.rollback()  # whatever the view left open
+        if response is None or response.status_code >= 500:
+            # Not a result worth replaying: release the key so a retry runs again
+            db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash,
+                                                               IdempotencyKey.status_code.is_(None)))
+            db.session.commit()
+            return
+        body = response.get_data(as_text=True)
+        db.session.execute(db.update(IdempotencyKey)
+                           .where(IdempotencyKey.key_hash == key_hash, IdempotencyKey.status_code.is_(None))
+                           .values(status_code=response.status_code, body=body, locked_until=None))
+        db.session.commit()
+        self.responses.set(key_hash, (request_hash, response.status_code, body))
+
+    def idempotent(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if key is None:
+                return view(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters'}), \
+                    HTTP_400_BAD_REQUEST
+            key_hash = hashlib.sha256(f'{request.method} {request.path} {key}'.encode()).hexdigest()
+            request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+            stored = self.responses.get(key_hash)
+            if stored is not None:
+                return self._replay(stored, request_hash)
+
+            with self._lock:
+                done = self._inflight.get(key_hash)
+                leader = done is None
+                if leader:
+                    done = self._inflight[key_hash] = threading.Event()
+            if not leader:
+                done.wait(self.wait)
+                stored = self.responses.get(key_hash)
+                return self._replay(stored, request_hash) if stored is not None else self._in_progress()
+
+            claimed, response = False, None
+            try:
+                stored = self._claim(key_hash, request_hash)
+                if stored == 'busy':
+                    return self._in_progress()
+                if stored is not None:
+                    return self._replay(stored, request_hash)
+                claimed = True
+                response = make_response(view(*args, **kwargs))
+                return response
+            finally:
+                try:
+                    if claimed:
+                        self._finish(key_hash, request_hash, response)
+                finally:
+                    with self._lock:
+                        self._inflight.pop(key_hash, None)
+                    done.set()
+
+        return wrapper
+
+    def purge(self):
+        # Deletes expired keys; returns how many
+        from app.extensions import db
+        from app.models.idempotency_key import IdempotencyKey
+
+        count = db.session.execute(
+            db.delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now())
+        ).rowcount
+        db.session.commit()
+        return count
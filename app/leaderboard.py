@@ -0,0 +1,278 @@
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+OVERALL = None  # board key of the all-categories leaderboard
+
+# window name -> (span, bucket width) in seconds; None for all time
+WINDOWS = {
+    'hour': (3600, 60),
+    'day': (86400, 900),
+    'week': (604800, 7200),
+    'all': None,
+}
+
+
+class TopK:
+    # The k largest counts of a {key: count} mapping, ordered by count then
+    # key. Exact under increments; when a count shrinks the board is marked
+    # stale and rebuilt from the counts on the next read.
+
+    def __init__(self, k):
+        self.k = k
+        self.entries = []  # [(-count, key)], ascending
+        self.stale = False
+
+    def increment(self, key, count):
+        # `count` is the key's new, larger count
+        if self.stale:
+            return
+        entries = [entry for entry in self.entries if entry[1] != key]
+        rank = (-count, key)
+        if len(entries) == len(self.entries) and len(entries) >= self.k and rank > entries[-1]:
+            return
+        entries.append(rank)
+        entries.sort()
+        self.entries = entries[:self.k]
+
+    def top(self, counts, n):
+        if self.stale:
+            self.entries = heapq.nsmallest(self.k, ((-count, key) for key, count in counts.items()))
+            self.stale = False
+        return [(key, -count) for count, key in self.entries[:n]]
+
+
+class Window:
+    # Units sold per category and product over one window. Rolling windows
+    # keep them in time buckets of `width` seconds; the oldest bucket is
+    # subtracted once it falls out of the span, so the window covers between
+    # span - width and span seconds.
+
+    def __init__(self, span, width, k):
+        self.span = span
+        self.width = width
+        self.k = k
+        self.buckets = deque()  # (bucket number, [(category_id, product_id, units)])
+        self.counts = {}  # board key -> {product_id: units}
+        self.boards = {}  # board key -> TopK
+
+    def _board(self, key):
+        board = self.boards.get(key)
+        if board is None:
+            board = self.boards[key] = TopK(self.k)
+            self.counts[key] = {}
+        return board
+
+    def add(self, category_id, product_id, units, at):
+        if self.span is not None:
+            bucket = int(at // self.width)
+            if bucket <= int(time.time() // self.width) - self.span // self.width:
+                return
+            if not self.buckets or self.buckets[-1][0] < bucket:
+                self.buckets.append((bucket, []))
+            # Late arrivals (clock skew between writers) go to the newest bucket
+            self.buckets[-1][1].append((category_id, product_id, units))
+        keys = (OVERALL,) if category_id is None else (OVERALL, category_id)
+        for key in keys:
+            board = self._board(key)
+            counts = self.counts[key]
+            counts[product_id] = counts.get(product_id, 0) + units
+            board.increment(product_id, counts[product_id])
+
+    def expire(self, now):
+        if self.span is None:
+            return
+        oldest = int(now // self.width) - self.span // self.width
+        while self.buckets and self.buckets[0][0] <= oldest:
+            _, entries = self.buckets.popleft()
+            for category_id, product_id, units in entries:
+                keys = (OVERALL,) if category_id is None else (OVERALL, category_id)
+                for key in keys:
+                    counts = self.counts[key]
+                    counts[product_id] -= units
+                    if counts[product_id] <= 0:
+                        del counts[product_id]
+                    self.boards[key].stale = True
+
+    def top(self, key, n):
+        if key not in self.boards:
+            return []
+        return self.boards[key].top(self.counts[key], n)
+
+
+class LeaderboardLoading(Exception):
+    pass
+
+
+class Leaderboard:
+    """Top-selling products by units, overall and per category.
+
+    Counters live in memory, one Window per entry of WINDOWS, each with a TopK
+    board per category, so GET /api/v1/products/top reads a few entries
+    instead of aggregating order_items. insert_orders() stages the items it
+    writes on the session; they are counted once that transaction commits
+    and dropped if it rolls back.
+
+    The first read starts a background thread that loads the counters from
+    the database (reads answer LeaderboardLoading until it has) and reloads
+    them every LEADERBOARD_RECONCILE_SECONDS. Reloading corrects drift:
+    orders written by other processes and products that changed category.
+    A reload reads the orders up to the highest order id when it starts;
+    orders above it that this process commits meanwhile are replayed on top.
+    """
+
+    def __init__(self):
+        self.categories = {}
+        self.windows = {}
+        self.loaded_at = None
+        self.reconciliations = 0
+        self._thread = None
+        self._replay = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        self.app = app
+        self.k = app.config.get('LEADERBOARD_TOP_K', 100)
+        self.interval = app.config.get('LEADERBOARD_RECONCILE_SECONDS', 300)
+        self.windows = self._empty_windows()
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_rollback', self._after_rollback)
+
+    def _empty_windows(self):
+        return {name: Window(*(spec or (None, None)), self.k) for name, spec in WINDOWS.items()}
+
+    def stage(self, items, at):
+        # Called inside the writing transaction with [(order_id, product_id, units)]
+        from app.extensions import db
+        from app.models.product import Product
+
+        missing = {product_id for _, product_id, _ in items if product_id not in self.categories}
+        if missing:
+            rows = db.session.execute(db.select(Product.id, Product.category_id).where(Product.id.in_(missing)))
+            self.categories.update(rows.all())
+        pending = db.session.info.setdefault('leaderboard', [])
+        timestamp = at.timestamp()
+        pending.extend((order_id, (self.categories.get(product_id), product_id, units, timestamp))
+                       for order_id, product_id, units in items)
+
+    def _after_commit(self, session):
+        pending = session.info.pop('leaderboard', None)
+        if pending:
+            with self._lock:
+                for _, entry in pending:
+                    for window in self.windows.values():
+                        window.add(*entry)
+                if self._replay is not None:
+                    self._replay.extend(pending)
+
+    def _after_rollback(self, session):
+        session.info.pop('leaderboard', None)
+
+    def top(self, window, category_id=OVERALL, n=10):
+        # [(product_id, units)], most units first. Raises LeaderboardLoading
+        # until the first load has finished.
+        self._start()
+        if self.loaded_at is None:
+            raise LeaderboardLoading()
+        with self._lock:
+            board = self.windows[window]
+            board.expire(time.time())
+            return board.top(category_id, n)
+
+    def reconcile(self):
+        # Rebuilds all windows from order_items and swaps them in
+        from app.extensions import db
+        from app.models.order import Order
+        from app.models.order_item import OrderItem
+        from app.models.product import Product
+
+        with self._load_lock:
+            with self._lock:
+                self._replay = []
+            started = time.time()
+            # Both queries read up to the same order, whatever commits meanwhile
+            high_water = db.session.scalar(db.select(db.func.max(Order.id))) or 0
+            read = (OrderItem.order_id <= high_water, OrderItem.product_id.isnot(None))
+            windows = self._empty_windows()
+            categories = dict(db.session.execute(db.select(Product.id, Product.category_id)).all())
+            totals = db.session.execute(
+                db.select(OrderItem.product_id, db.func.sum(OrderItem.quantity))
+                .where(*read).group_by(OrderItem.product_id)
+            )
+            for product_id, units in totals:
+                windows['all'].add(categories.get(product_id), product_id, int(units), started)
+
+            longest = max(spec[0] for spec in WINDOWS.values() if spec)
+            recent = db.session.execute(
+                db.select(OrderItem.product_id, OrderItem.quantity, OrderItem.created_at)
+                .where(OrderItem.created_at >= datetime.fromtimestamp(started - longest), *read)
+                .order_by(OrderItem.created_at)
+                .execution_options(yield_per=5000)
+            )
+            rolling = [window for name, window in windows.items() if WINDOWS[name]]
+            for product_id, units, created_at in recent:
+                at = created_at.timestamp()
+                for window in rolling:
+                    if at > started - window.span:
+                        window.add(categories.get(product_id), product_id, units, at)
+            db.session.rollback()  # end the read transaction
+
+            with self._lock:
+                # Orders committed here during the reload and not read by it.
+                # One below the high-water id that was still uncommitted when
+                # the reload read is missed until the next reload.
+                for order_id, entry in self._replay:
+                    if order_id > high_water:
+                        for window in windows.values():
+                            window.add(*entry)
+                self._replay = None
+                self.categories = categories
+                self.windows = windows
+                self.loaded_at = datetime.now()
+                self.reconciliations += 1
+            log.info('leaderboard reconciled in %.3fs', time.time() - started)
+
+    def _start(self):
+        # The loading thread starts with the first read, so CLI commands and
+        # processes that never serve the leaderboard run no thread
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='leaderboard', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        # Loads now, then reloads every `interval` seconds (0: load once)
+        while True:
+            try:
+                with self.app.app_context():
+                    self.reconcile()
+            except Exception:
+                log.exception('leaderboard reconciliation failed')
+                if self.loaded_at is None and not self._stopping.wait(5):
+                    continue  # no counters yet, retry the first load soon
+            if not self.interval or self._stopping.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self):
+        return {
+            'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+            'reconciliations': self.reconciliations,
+            'reconcile_seconds': self.interval,
+            'products': {name: len(window.counts.get(OVERALL, {})) for name, window in self.windows.items()}
+        }
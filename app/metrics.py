@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram: observing a value is a bisect and two additions."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class EndpointStats:
+    __slots__ = ('latency', 'statements', 'sql_time', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.sql_time = Histogram(LATENCY_BUCKETS)
+        self.statuses = {}
+
+
+class Metrics:
+    """Per-endpoint request latency and SQL usage, served as Prometheus text on /metrics."""
+
+    def __init__(self):
+        self.endpoints = {}  # (endpoint, method) -> EndpointStats
+        self.lock = threading.Lock()
+        self.server_timing = False
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', False)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view, methods=['GET'])
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is None or not has_request_context() or 'sql_statements' not in g:
+            return
+        g.sql_statements += 1
+        g.sql_seconds += time.perf_counter() - context.metrics_start
+
+    def _after_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        statements = g.sql_statements
+        sql_seconds = g.sql_seconds
+        key = (request.endpoint or 'unmatched', request.method)
+
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.latency.observe(elapsed)
+            stats.statements.observe(statements)
+            stats.sql_time.observe(sql_seconds)
+            stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'app;dur={elapsed * 1000:.2f}, db;dur={sql_seconds * 1000:.2f};desc="{statements} queries"'
+            )
+        return response
+
+    def render(self):
+        from app.extensions import cache, pool_monitor
+
+        lines = [
+            '# HELP http_requests_total Requests by endpoint, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            for name, attr, help_text in (
+                ('http_request_duration_seconds', 'latency', 'Request latency.'),
+                ('http_request_sql_statements', 'statements', 'SQL statements executed per request.'),
+                ('http_request_sql_seconds', 'sql_time', 'Time spent in SQL per request.'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), stats in endpoints:
+                    lines.extend(getattr(stats, attr).lines(name, f'endpoint="{endpoint}",method="{method}"'))
+
+        cache_stats = cache.stats()
+        lines.append('# TYPE cache_hits_total counter')
+        lines.append(f"cache_hits_total {cache_stats['hits']}")
+        lines.append('# TYPE cache_misses_total counter')
+        lines.append(f"cache_misses_total {cache_stats['misses']}")
+        lines.append('# TYPE cache_entries gauge')
+        lines.append(f"cache_entries {cache_stats['entries']}")
+
+        pools = pool_monitor.snapshot()
+        for name, key, kind in (
+            ('db_pool_in_use', 'in_use', 'gauge'),
+            ('db_pool_overflow', 'overflow', 'gauge'),
+            ('db_pool_checkouts_total', 'checkouts', 'counter'),
+            ('db_pool_checkout_wait_seconds_total', 'checkout_wait_seconds_total', 'counter'),
+            ('db_pool_checkout_timeouts_total', 'checkout_timeouts', 'counter'),
+        ):
+            lines.append(f'# TYPE {name} {kind}')
+            for engine, snapshot in sorted(pools.items()):
+                lines.append(f'{name}{{engine="{engine}"}} {snapshot.get(key, 0)}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
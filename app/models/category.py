@@ -4,7 +4,10 @@ class Category(db.Model):
     __tablename__ = 'categories'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     products = db.relationship('Product', backref='category', lazy=True)
 
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<Category {self.name}>'
\ No newline at end of file
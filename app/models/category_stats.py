@@ -0,0 +1,113 @@
+from sqlalchemy import bindparam, case, event, func
+from sqlalchemy.orm.attributes import get_history
+
+from app.extensions import db
+from app.models.product import Product
+from app.upsert import upsert
+
+class CategoryStats(db.Model):
+    # Product count and price aggregates per category, kept up to date on every
+    # product write so the summary reads one row per category
+    __tablename__ = 'category_stats'
+    category_id = db.Column(db.Integer, primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    price_sum = db.Column(db.Float, nullable=False, default=0)
+    min_price = db.Column(db.Float, nullable=True)
+    max_price = db.Column(db.Float, nullable=True)
+
+    def __repr__(self):
+        return f'<CategoryStats {self.category_id}: {self.product_count}>'
+
+
+def _aggregate(products):
+    # [(category_id, price), ...] -> {category_id: (count, sum, min, max)}
+    totals = {}
+    for category_id, price in products:
+        if category_id is None:
+            continue
+        price = float(price)
+        count, total, low, high = totals.get(category_id, (0, 0.0, price, price))
+        totals[category_id] = (count + 1, total + price, min(low, price), max(high, price))
+    return totals
+
+
+def refresh_category_stats(connection, category_ids=None):
+    # Recomputes the stats of `category_ids` (ids, or a SELECT of them), or of
+    # every category, from products
+    table = CategoryStats.__table__
+    delete = table.delete()
+    query = db.select(
+        Product.category_id, func.count(), func.sum(Product.price), func.min(Product.price), func.max(Product.price)
+    ).where(Product.category_id.isnot(None)).group_by(Product.category_id)
+    if category_ids is not None:
+        if isinstance(category_ids, (list, set, tuple)) and not category_ids:
+            return
+        delete = delete.where(table.c.category_id.in_(category_ids))
+        query = query.where(Product.category_id.in_(category_ids))
+    connection.execute(delete)
+    connection.execute(table.insert().from_select(
+        ['category_id', 'product_count', 'price_sum', 'min_price', 'max_price'], query
+    ))
+
+
+def apply_product_changes(connection, removed=(), added=()):
+    # Folds products written since the stats were last correct into them.
+    # `removed` are the (category_id, price) pairs rows had before the write,
+    # `added` the pairs they have after it; call once the write has executed.
+    # Count and sum are adjusted in place. A category is recomputed only when a
+    # removed price was its min or max, which a delta cannot undo.
+    table = CategoryStats.__table__
+    removed, added = _aggregate(removed), _aggregate(added)
+
+    stale = set()
+    if removed:
+        current = {row.category_id: row for row in connection.execute(
+            db.select(table).where(table.c.category_id.in_(removed))
+        )}
+        for category_id, (count, _, low, high) in removed.items():
+            row = current.get(category_id)
+            if row is None or row.product_count <= count or low <= row.min_price or high >= row.max_price:
+                stale.add(category_id)
+    refresh_category_stats(connection, stale)
+
+    decrements = [{'key': c, 'count': n, 'total': s} for c, (n, s, _, _) in removed.items() if c not in stale]
+    if decrements:
+        connection.execute(table.update().where(table.c.category_id == bindparam('key')).values(
+            product_count=table.c.product_count - bindparam('count'),
+            price_sum=table.c.price_sum - bindparam('total')
+        ), decrements)
+
+    increments = [
+        {'category_id': c, 'product_count': n, 'price_sum': s, 'min_price': low, 'max_price': high}
+        for c, (n, s, low, high) in added.items() if c not in stale
+    ]
+    if increments:
+        connection.execute(upsert(connection.dialect.name, table, ['category_id'], lambda new: {
+            'product_count': table.c.product_count + new.product_count,
+            'price_sum': table.c.price_sum + new.price_sum,
+            'min_price': case((new.min_price < table.c.min_price, new.min_price), else_=table.c.min_price),
+            'max_price': case((new.max_price > table.c.max_price, new.max_price), else_=table.c.max_price),
+        }), increments)
+
+
+def _previous(target, name):
+    history = get_history(target, name)
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+@event.listens_for(Product, 'after_insert')
+def _product_inserted(mapper, connection, target):
+    apply_product_changes(connection, added=[(target.category_id, target.price)])
+
+
+@event.listens_for(Product, 'after_update')
+def _product_updated(mapper, connection, target):
+    before = (_previous(target, 'category_id'), _previous(target, 'price'))
+    after = (target.category_id, target.price)
+    if before != after:
+        apply_product_changes(connection, removed=[before], added=[after])
+
+
+@event.listens_for(Product, 'after_delete')
+def _product_deleted(mapper, connection, target):
+    apply_product_changes(connection, removed=[(target.category_id, target.price)])
@@ -6,7 +6,13 @@ class Customer(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     orders = db.relationship('Order', backref='customer', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_customers_created_at', 'created_at'),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<Customer {self.name}>'
\ No newline at end of file
@@ -0,0 +1,22 @@
+from app.extensions import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    # A claimed Idempotency-Key and, once the request finished, its response.
+    # status_code is NULL while the first request is still running, which
+    # holds the key until locked_until.
+    __tablename__ = 'idempotency_keys'
+    key_hash = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    body = db.Column(db.Text, nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_idempotency_keys_expires_at', 'expires_at'),  # purge
+    )
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key_hash[:12]}>'
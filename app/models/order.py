@@ -7,5 +7,10 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     order_items = db.relationship('OrderItem', backref='order', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_orders_customer_id_id', 'customer_id', 'id'),  # per-customer order history
+        db.Index('ix_orders_created_at', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<Order {self.id}>'
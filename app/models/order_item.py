@@ -6,7 +6,13 @@ class OrderItem(db.Model):
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
     quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=True)  # the product's price when ordered
     created_at = db.Column(db.DateTime, default=datetime.now)
 
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),  # items by order
+        db.Index('ix_order_items_created_at', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<OrderItem {self.id}>'
\ No newline at end of file
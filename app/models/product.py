@@ -1,3 +1,4 @@
+from sqlalchemy import DDL, event
 from app.extensions import db
 from datetime import datetime
 
@@ -8,11 +9,42 @@ class Product(db.Model):
     price = db.Column(db.Float, nullable=False)
     description = db.Column(db.String(255), nullable=True)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
+    sku = db.Column(db.String(64), nullable=True)  # natural key for imports
     created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # optimistic concurrency, see app/versioning.py
 
     # Relationship
     orders = db.relationship('OrderItem', backref='product', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_products_category_id_id', 'category_id', 'id'),  # products by category
+        db.Index('ix_products_created_at', 'created_at'),
+        db.Index('ix_products_price', 'price'),  # price range filters and sort
+        db.Index('ix_products_updated_at_id', 'updated_at', 'id'),  # changes feed
+        db.UniqueConstraint('sku', name='uq_products_sku'),
+        # Full-text search on MySQL; SQLite uses the products_fts table below
+        db.Index('ix_products_fulltext', 'name', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<Product {self.name}>'
+
+
+# SQLite FTS5 index over name/description, kept in sync by triggers so every
+# write path (ORM, bulk statements, imports) updates it.
+PRODUCTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE products_fts USING fts5(name, description, content='products', content_rowid='id')",
+    "CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+for statement in PRODUCTS_FTS_DDL:
+    event.listen(Product.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, 'after_drop', DDL('DROP TABLE IF EXISTS products_fts').execute_if(dialect='sqlite'))
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.product import Product
+
+class ProductTombstone(db.Model):
+    # One row per deleted product, read by the changes feed
+    __tablename__ = 'product_tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    sku = db.Column(db.String(64), nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_product_tombstones_deleted_at_id', 'deleted_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ProductTombstone {self.product_id}>'
+
+
+@event.listens_for(Product, 'after_delete')
+def record_product_delete(mapper, connection, target):
+    # Written in the same flush as the DELETE, so it commits or rolls back with it
+    connection.execute(ProductTombstone.__table__.insert().values(
+        product_id=target.id, sku=target.sku, deleted_at=datetime.now()
+    ))
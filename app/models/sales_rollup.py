@@ -0,0 +1,49 @@
+from app.extensions import db
+
+# Sales rolled up from order_items by `flask rollup-sales`. Revenue is
+# quantity * the item's unit_price, the price it was ordered at.
+
+class SalesDaily(db.Model):
+    __tablename__ = 'sales_daily'
+    day = db.Column(db.Date, primary_key=True)
+    units = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesDaily {self.day}>'
+
+
+class SalesDailyProduct(db.Model):
+    __tablename__ = 'sales_daily_product'
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_sales_daily_product_product_id_day', 'product_id', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<SalesDailyProduct {self.day} {self.product_id}>'
+
+
+class SalesDailyCategory(db.Model):
+    __tablename__ = 'sales_daily_category'
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesDailyCategory {self.day} {self.category_id}>'
+
+
+class RollupWatermark(db.Model):
+    # Last source row folded into a rollup, e.g. ('sales', <order_items.id>)
+    __tablename__ = 'rollup_watermarks'
+    name = db.Column(db.String(64), primary_key=True)
+    last_id = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<RollupWatermark {self.name}={self.last_id}>'
@@ -0,0 +1,33 @@
+from app.extensions import db
+
+class StockBucket(db.Model):
+    # Available units of a product, split over one or more buckets (stripes) so
+    # concurrent checkouts of a hot product decrement different rows. Products
+    # without buckets do not track stock.
+    __tablename__ = 'stock_buckets'
+    product_id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<StockBucket {self.product_id}/{self.bucket}: {self.quantity}>'
+
+
+class StockReservation(db.Model):
+    # Units taken out of a bucket and held until an order consumes them or the
+    # reservation expires and they are put back
+    __tablename__ = 'stock_reservations'
+    id = db.Column(db.Integer, primary_key=True)
+    reservation_id = db.Column(db.String(32), nullable=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    bucket = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_stock_reservations_reservation_id', 'reservation_id'),
+        db.Index('ix_stock_reservations_expires_at', 'expires_at'),  # expiry sweep
+    )
+
+    def __repr__(self):
+        return f'<StockReservation {self.reservation_id} {self.product_id}x{self.quantity}>'
@@ -0,0 +1,9 @@
+from app.extensions import db
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}={self.version}>'
@@ -0,0 +1,158 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from app.cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class OrderIntake:
+    """Asynchronous order intake: a bounded queue drained by a pool of writers.
+
+    Orders are validated by the request, queued and acknowledged with a ticket.
+    Each writer takes up to ORDER_INTAKE_BATCH_SIZE queued orders (waiting at
+    most ORDER_INTAKE_BATCH_WAIT_MS for the batch to fill) and writes them in
+    one transaction, so a burst costs one commit per batch instead of one per
+    order. When the queue is full, submit() raises QueueFull and the caller
+    answers 503 instead of queueing more work than the writers can absorb.
+
+    Queue and tickets live in this process: with several processes a ticket
+    can only be looked up on the process that issued it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.tickets = TTLCache()
+        self.submitted = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue = None
+        self._workers = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ORDER_INTAKE_ASYNC', False)
+        self.worker_count = app.config.get('ORDER_INTAKE_WORKERS', 2)
+        self.batch_size = app.config.get('ORDER_INTAKE_BATCH_SIZE', 100)
+        self.batch_wait = app.config.get('ORDER_INTAKE_BATCH_WAIT_MS', 20) / 1000
+        self._queue = queue.Queue(maxsize=app.config.get('ORDER_INTAKE_QUEUE_SIZE', 10000))
+        self.tickets.max_entries = app.config.get('ORDER_INTAKE_MAX_TICKETS', 100000)
+        self.tickets.ttl = app.config.get('ORDER_INTAKE_TICKET_TTL_SECONDS', 3600)
+
+    def _start(self):
+        # Writers start with the first submitted order, so CLI commands and
+        # processes that never take orders run no threads
+        with self._lock:
+            if self._workers:
+                return
+            for n in range(self.worker_count):
+                worker = threading.Thread(target=self._run, name=f'order-intake-{n}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            atexit.register(self.stop)
+
+    def submit(self, order):
+        # Queues a validated order; returns the ticket id
+        self._start()
+        ticket = uuid.uuid4().hex
+        self.tickets.set(ticket, {'status': 'queued'})
+        try:
+            self._queue.put_nowait((ticket, order))
+        except queue.Full:
+            self.tickets.delete(ticket)
+            self.rejected += 1
+            raise QueueFull()
+        self.submitted += 1
+        return ticket
+
+    def status(self, ticket):
+        return self.tickets.get(ticket)
+
+    def stop(self, timeout=10):
+        # Lets the writers drain what is queued, then stops them
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                with self.app.app_context():
+                    self._write(batch)
+            except Exception:
+                log.exception('order intake writer failed on a batch of %d', len(batch))
+
+    def _write(self, batch):
+        from app.extensions import db
+        from app.services.order_service import insert_orders
+
+        for ticket, _ in batch:
+            self.tickets.set(ticket, {'status': 'processing'})
+        try:
+            order_ids = insert_orders([order for _, order in batch])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            log.exception('order intake batch of %d failed, retrying one by one', len(batch))
+            order_ids = None
+        self.batches += 1
+
+        if order_ids is not None:
+            for (ticket, _), order_id in zip(batch, order_ids):
+                self.tickets.set(ticket, {'status': 'done', 'order_id': order_id})
+            self.written += len(batch)
+            return
+        # One bad order must not fail the others queued with it
+        for ticket, order in batch:
+            try:
+                order_id = insert_orders([order])[0]
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.tickets.set(ticket, {'status': 'failed', 'error': str(getattr(e, 'orig', e))})
+                self.failed += 1
+            else:
+                self.tickets.set(ticket, {'status': 'done', 'order_id': order_id})
+                self.written += 1
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'capacity': self._queue.maxsize if self._queue else 0,
+            'workers': len(self._workers),
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches
+        }
@@ -0,0 +1,34 @@
+from flask import request
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def _int_arg(name, default):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f"'{name}' must be an integer")
+
+
+def get_page_args():
+    # Keyset pagination: `after` is the last id of the previous page,
+    # `limit` the number of rows to return.
+    limit = _int_arg('limit', DEFAULT_PAGE_SIZE)
+    after = _int_arg('after', 0)
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise PaginationError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+    if after < 0:
+        raise PaginationError("'after' must not be negative")
+    return limit, after
+
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,149 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited."""
+
+    wait_listener = None
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.wait_listener is not None:
+                self.wait_listener(time.perf_counter() - start, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_listener = self.wait_listener
+        return pool
+
+
+def engine_options(config):
+    # Builds SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings. Values already
+    # present in SQLALCHEMY_ENGINE_OPTIONS win.
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_pre_ping', config.get('DB_POOL_PRE_PING', True))
+
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory SQLite runs on a single shared connection (StaticPool)
+        return options
+
+    options.setdefault('poolclass', InstrumentedQueuePool)
+    options.setdefault('pool_size', config.get('DB_POOL_SIZE', 10))
+    options.setdefault('max_overflow', config.get('DB_MAX_OVERFLOW', 20))
+    options.setdefault('pool_timeout', config.get('DB_POOL_TIMEOUT', 10))
+    options.setdefault('pool_recycle', config.get('DB_POOL_RECYCLE', 1800))
+    return options
+
+
+class PoolStats:
+    def __init__(self, engine):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.peak_in_use = 0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    @property
+    def pool(self):
+        return self.engine.pool
+
+    def overflow(self):
+        # Connections opened beyond pool_size (QueuePool only)
+        if isinstance(self.pool, QueuePool):
+            return max(self.pool.overflow(), 0)
+        return 0
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        overflow = self.overflow()
+        with self.lock:
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self.checkouts - self.checkins)
+            if overflow:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.checkins += 1
+
+    def on_wait(self, seconds, timed_out):
+        with self.lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        with self.lock:
+            snapshot = {
+                'pool_class': type(self.pool).__name__,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'in_use': self.checkouts - self.checkins,
+                'peak_in_use': self.peak_in_use,
+                'overflow_checkouts': self.overflow_checkouts,
+                'peak_overflow': self.peak_overflow,
+                'checkout_waits': self.waits,
+                'checkout_wait_seconds_total': round(self.wait_seconds_total, 6),
+                'checkout_wait_seconds_avg': round(self.wait_seconds_total / self.waits, 6) if self.waits else None,
+                'checkout_wait_seconds_max': round(self.wait_seconds_max, 6),
+                'checkout_timeouts': self.timeouts
+            }
+        if isinstance(self.pool, QueuePool):
+            snapshot.update({
+                'pool_size': self.pool.size(),
+                'idle': self.pool.checkedin(),
+                'overflow': self.overflow(),
+                'max_overflow': self.pool._max_overflow,
+                'timeout_seconds': self.pool.timeout()
+            })
+        return snapshot
+
+
+class PoolMonitor:
+    """Tracks connection pool saturation for every engine of the app."""
+
+    def __init__(self):
+        self.engines = {}  # bind key -> PoolStats
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        with app.app_context():
+            for key, engine in db.engines.items():
+                stats = PoolStats(engine)
+                event.listen(engine, 'connect', stats.on_connect)
+                event.listen(engine, 'checkout', stats.on_checkout)
+                event.listen(engine, 'checkin', stats.on_checkin)
+                if isinstance(engine.pool, InstrumentedQueuePool):
+                    engine.pool.wait_listener = stats.on_wait
+                self.engines[key or 'default'] = stats
+
+    def snapshot(self):
+        return {key: stats.snapshot() for key, stats in self.engines.items()}
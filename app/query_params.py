@@ -0,0 +1,224 @@
+import base64
+import json
+import re
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import and_, false, or_
+
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Query string keys owned by other features, never treated as filters
+RESERVED_ARGS = {'limit', 'after', 'sort', 'fields', 'stream', 'q', 'offset', 'format', 'gzip', 'chunk_size', 'upsert'}
+OPERATORS = ('eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'in')
+MAX_IN_VALUES = 500
+
+_FILTER_ARG = re.compile(r'^(\w+)(?:\[(\w+)\])?$')
+
+
+class QueryParamError(ValueError):
+    pass
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value)
+
+
+def sortable_columns(model):
+    # A column can be sorted on when an index (or unique constraint) starts with
+    # it, so ORDER BY never needs a full table sort. FULLTEXT indexes don't count.
+    table = model.__table__
+    names = {c.name for c in table.primary_key.columns}
+    for index in table.indexes:
+        if not index.kwargs.get('mysql_prefix'):
+            names.add(index.columns[0].name)
+    for constraint in table.constraints:
+        if constraint.__class__.__name__ == 'UniqueConstraint' and constraint.columns:
+            names.add(list(constraint.columns)[0].name)
+    return names
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, name='after'):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        raise QueryParamError(f"'{name}' is not a valid cursor")
+
+
+class ListQuery:
+    """Filters, sort and keyset pagination from the query string, compiled to SQL.
+
+    `filterable` maps each filterable column name to the function converting a
+    query string value to the column's type, e.g. {'price': float}. Supported:
+
+        ?price=10                 equality (also price[eq], price[ne])
+        ?price[gte]=5&price[lt]=9 ranges (gt, gte, lt, lte)
+        ?category_id[in]=1,2,3    IN lists
+        ?created_at[gte]=2025-01-01T00:00:00
+        ?sort=-created_at,id      sort on indexed columns, '-' for descending
+
+    Pages are keyset based: `after` is the `next` cursor of the previous page,
+    a plain id when sorting by id, an opaque token otherwise. NULLs sort
+    before every value, as they do natively on MySQL and SQLite, and rows
+    with a NULL sort key page like any other. With paginate=False there is
+    no limit (streams, small tables).
+    """
+
+    def __init__(self, model, filterable, paginate=True, args=None):
+        self.model = model
+        self.paginate = paginate
+        args = request.args if args is None else args
+        self.filters = self._parse_filters(model, filterable, args)
+        self.sort = self._parse_sort(model, filterable, args.get('sort', 'id'))
+        self.limit = self._parse_limit(args.get('limit')) if paginate else None
+        self.after = self._parse_after(filterable, args.get('after'))
+
+    def _column(self, name):
+        return getattr(self.model, name)
+
+    def _parse_filters(self, model, filterable, args):
+        filters = []
+        for key, value in args.items(multi=True):
+            if key in RESERVED_ARGS:
+                continue
+            match = _FILTER_ARG.match(key)
+            if not match or match.group(1) not in filterable:
+                raise QueryParamError(f"Unknown filter '{key}', expected one of {sorted(filterable)}")
+            name, op = match.group(1), match.group(2) or 'eq'
+            if op not in OPERATORS:
+                raise QueryParamError(f"Unknown operator '{op}' in '{key}', expected one of {list(OPERATORS)}")
+            convert = filterable[name]
+            try:
+                if op == 'in':
+                    values = [convert(v) for v in value.split(',') if v != '']
+                    if not values or len(values) > MAX_IN_VALUES:
+                        raise QueryParamError(f"'{key}' takes 1 to {MAX_IN_VALUES} comma separated values")
+                else:
+                    values = convert(value)
+            except (TypeError, ValueError) as e:
+                if isinstance(e, QueryParamError):
+                    raise
+                raise QueryParamError(f"Invalid value for '{key}'")
+            column = self._column(name)
+            filters.append({
+                'eq': lambda: column == values,
+                'ne': lambda: column != values,
+                'gt': lambda: column > values,
+                'gte': lambda: column >= values,
+                'lt': lambda: column < values,
+                'lte': lambda: column <= values,
+                'in': lambda: column.in_(values),
+            }[op]())
+        return filters
+
+    def _parse_sort(self, model, filterable, value):
+        allowed = sortable_columns(model)
+        sort = []
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            descending = part.startswith('-')
+            name = part.lstrip('-+')
+            if name not in allowed or (name != 'id' and name not in filterable):
+                raise QueryParamError(f"Cannot sort on '{name}', sortable columns are {sorted(allowed)}")
+            sort.append((name, descending))
+        if not any(name == 'id' for name, _ in sort):
+            # Unique tie-breaker for keyset pages, in the leading key's
+            # direction so (key, id) indexes are scanned one way
+            sort.append(('id', sort[0][1] if sort else False))
+        return sort
+
+    def _parse_limit(self, value):
+        if value in (None, ''):
+            return DEFAULT_PAGE_SIZE
+        try:
+            limit = int(value)
+        except ValueError:
+            raise QueryParamError("'limit' must be an integer")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise QueryParamError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+        return limit
+
+    @property
+    def simple_sort(self):
+        return self.sort == [('id', False)]
+
+    def _parse_after(self, filterable, value):
+        if value in (None, ''):
+            return None
+        if self.simple_sort:
+            try:
+                return [int(value)]
+            except ValueError:
+                raise QueryParamError("'after' must be an integer")
+        values = decode_cursor(value)
+        if not isinstance(values, list) or len(values) != len(self.sort):
+            raise QueryParamError("'after' does not match the requested sort")
+        try:
+            return [None if v is None and self._column(name).nullable else filterable.get(name, int)(v)
+                    for (name, _), v in zip(self.sort, values)]
+        except (TypeError, ValueError):
+            raise QueryParamError("'after' is not a valid cursor")
+
+    def apply(self, query):
+        query = query.where(*self.filters)
+        for name, _ in self.sort:
+            column = self._column(name)
+            if name not in query.selected_columns:
+                query = query.add_columns(column)
+        if self.after is not None:
+            query = query.where(self._keyset_condition())
+        query = query.order_by(*(self._column(n).desc() if d else self._column(n) for n, d in self.sort))
+        if self.paginate:
+            query = query.limit(self.limit + 1)  # one extra row tells if there is a next page
+        return query
+
+    def _keyset_condition(self):
+        # (a, b, id) after (x, y, z) ==  a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+        # with NULL below every value; `column == None` compiles to IS NULL
+        clauses = []
+        for i, (name, descending) in enumerate(self.sort):
+            equal = [self._column(n) == v for (n, _), v in zip(self.sort[:i], self.after)]
+            column, value = self._column(name), self.after[i]
+            if value is None:
+                beyond = false() if descending else column.isnot(None)
+            elif descending:
+                beyond = or_(column < value, column.is_(None)) if column.nullable else column < value
+            else:
+                beyond = column > value
+            clauses.append(and_(*equal, beyond))
+        return or_(*clauses)
+
+    def page(self, rows):
+        # Returns (rows of this page, cursor of the next page or None)
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        last = rows[-1]
+        if self.simple_sort:
+            return rows, last.id
+        return rows, encode_cursor([getattr(last, name) for name, _ in self.sort])
+
+
+def parse_fields(allowed, default, args=None):
+    # ?fields=id,name,price -> ('id', 'name', 'price'); only these columns are selected
+    value = (request.args if args is None else args).get('fields')
+    if not value:
+        return default
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    if not fields:
+        raise QueryParamError("'fields' must name at least one field")
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise QueryParamError(f"Unknown fields {unknown}, expected a subset of {list(allowed)}")
+    return fields
+
+
+def field_columns(model, fields):
+    return [getattr(model, f) for f in fields]
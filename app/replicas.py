@@ -0,0 +1,167 @@
+import itertools
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.db_events import on_write, track_changes
+
+PIN_COOKIE = 'db_pin'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def replica_binds(config):
+    # SQLALCHEMY_BINDS with one `replica_<n>` bind per DATABASE_REPLICA_URLS entry
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    for n, url in enumerate(config.get('DATABASE_REPLICA_URLS') or ()):
+        binds[f'replica_{n}'] = url
+    return binds
+
+
+class RoutingSession(Session):
+    """db.session that sends the reads of GET requests to a replica.
+
+    Writes, flushes and everything outside a GET request use the primary, as
+    do GETs the Replicas extension has pinned to it.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            from app.extensions import replicas
+
+            engine = replicas.read_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.down_until = 0.0
+        self.checked_at = 0.0
+        self.reads = 0
+        self.failures = 0
+
+
+class Replicas:
+    """Read-replica routing for GET traffic.
+
+    Replicas are the `replica_<n>` binds built from DATABASE_REPLICA_URLS. Each
+    GET request picks one healthy replica (round robin) and RoutingSession runs
+    its reads there. A request that writes sets a short-lived cookie pinning
+    that client's GETs to the primary for DB_REPLICA_PIN_SECONDS, so it reads
+    its own writes despite replication lag; `X-Read-Consistency: primary`
+    pins a single request. A replica is pinged before use at most every
+    DB_REPLICA_CHECK_SECONDS and is skipped for DB_REPLICA_RETRY_SECONDS after
+    a failed ping or connection error; with no healthy replica, reads go to
+    the primary.
+    """
+
+    def __init__(self):
+        self.replicas = []
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        self.pin_seconds = app.config.get('DB_REPLICA_PIN_SECONDS', 5)
+        self.check_seconds = app.config.get('DB_REPLICA_CHECK_SECONDS', 5)
+        self.retry_seconds = app.config.get('DB_REPLICA_RETRY_SECONDS', 30)
+        with app.app_context():
+            self.replicas = [Replica(key, engine) for key, engine in sorted(db.engines.items(), key=lambda e: str(e[0]))
+                             if isinstance(key, str) and key.startswith('replica_')]
+        if not self.replicas:
+            return
+        for replica in self.replicas:
+            event.listen(replica.engine, 'handle_error', self._on_error(replica))
+        track_changes(db.session)
+        on_write(self._on_write)
+        app.after_request(self._after_request)
+
+    def _on_error(self, replica):
+        def handle_error(context):
+            # Failing to connect or losing the connection takes the replica out of rotation
+            if context.is_disconnect or context.connection is None:
+                self._mark_down(replica)
+        return handle_error
+
+    def _mark_down(self, replica):
+        replica.failures += 1
+        replica.down_until = time.monotonic() + self.retry_seconds
+
+    def _healthy(self, replica):
+        now = time.monotonic()
+        if replica.down_until > now:
+            return False
+        if now - replica.checked_at >= self.check_seconds:
+            try:
+                with replica.engine.connect() as conn:
+                    conn.exec_driver_sql('SELECT 1')
+            except Exception:
+                self._mark_down(replica)
+                return False
+            replica.checked_at = now
+        return True
+
+    def _pinned(self):
+        if request.headers.get('X-Read-Consistency', '').lower() == 'primary' or g.get('db_wrote'):
+            return True
+        try:
+            return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _replica(self):
+        # The replica this request reads from, or None for the primary
+        if not self.replicas or not has_request_context() or request.method not in READ_METHODS:
+            return None
+        if 'db_replica' not in g:
+            g.db_replica = None
+            if not self._pinned():
+                start = next(self._next)
+                for n in range(len(self.replicas)):
+                    replica = self.replicas[(start + n) % len(self.replicas)]
+                    if self._healthy(replica):
+                        g.db_replica = replica
+                        break
+        return None if g.get('db_wrote') else g.db_replica
+
+    def read_engine(self):
+        # The replica engine for reads in this request, or None for the primary
+        replica = self._replica()
+        if replica is None:
+            return None
+        replica.reads += 1
+        return replica.engine
+
+    def cache_scope(self):
+        # Namespace for cached responses. Bodies read from a replica may lag
+        # the primary, so they must not be served to requests pinned to it.
+        if not self.replicas:
+            return ''
+        return 'replica' if self._replica() is not None else 'primary'
+
+    def _on_write(self, session, tables):
+        if has_request_context():
+            g.db_wrote = True
+
+    def _after_request(self, response):
+        if g.get('db_wrote'):
+            response.set_cookie(PIN_COOKIE, str(time.time() + self.pin_seconds), max_age=self.pin_seconds,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {replica.name: {
+            'url': replica.engine.url.render_as_string(hide_password=True),
+            'healthy': replica.down_until <= now,
+            'reads': replica.reads,
+            'failures': replica.failures
+        } for replica in self.replicas}
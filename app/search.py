@@ -0,0 +1,61 @@
+import re
+
+from sqlalchemy import text
+from sqlalchemy.dialects.mysql import match
+
+from app.extensions import db
+from app.models.product import Product
+
+MAX_SEARCH_OFFSET = 10000
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+class MySQLFullTextSearch:
+    """MATCH ... AGAINST on the ix_products_fulltext FULLTEXT index."""
+
+    def search(self, columns, q, category_id, limit, offset):
+        score = match(Product.name, Product.description, against=q).in_natural_language_mode()
+        query = db.select(*columns, score.label('score')).where(score > 0)
+        if category_id is not None:
+            query = query.where(Product.category_id == category_id)
+        return query.order_by(score.desc(), Product.id).limit(limit).offset(offset)
+
+
+class SQLiteFTS5Search:
+    """products_fts FTS5 table, ranked with bm25 (lower is better)."""
+
+    fts = db.table('products_fts', db.column('rowid'))
+
+    def search(self, columns, q, category_id, limit, offset):
+        # Quote every word so user input can't use FTS5 query syntax; OR them
+        # to match MySQL's natural language mode.
+        terms = ' OR '.join(f'"{word}"' for word in _WORD.findall(q))
+        rank = db.func.bm25(text('products_fts'))
+        query = (
+            db.select(*columns, (-rank).label('score'))
+            .join(self.fts, self.fts.c.rowid == Product.id)
+            .where(text('products_fts MATCH :terms').bindparams(terms=terms))
+        )
+        if category_id is not None:
+            query = query.where(Product.category_id == category_id)
+        return query.order_by(rank, Product.id).limit(limit).offset(offset)
+
+
+BACKENDS = {'mysql': MySQLFullTextSearch(), 'sqlite': SQLiteFTS5Search()}
+
+
+class SearchError(ValueError):
+    pass
+
+
+def search_products(columns, q, category_id=None, limit=20, offset=0):
+    # Returns one page of ranked rows: `columns` plus a `score` (higher is better)
+    if not _WORD.search(q or ''):
+        raise SearchError("'q' must contain at least one word")
+    if offset > MAX_SEARCH_OFFSET:
+        raise SearchError(f"'offset' must not exceed {MAX_SEARCH_OFFSET}")
+    backend = BACKENDS.get(db.session.get_bind().dialect.name)
+    if backend is None:
+        raise SearchError('full-text search is not available on this database')
+    return db.session.execute(backend.search(columns, q, category_id, limit, offset)).all()
@@ -0,0 +1,65 @@
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import DateTime, inspect
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used without it
+    orjson = None
+
+# Serializers are generated once per (model, fields) and reused. Each one is a
+# single dict literal indexing into a row of a column-only select (positional
+# access on a Row is an order of magnitude cheaper than attribute access), so a
+# list of rows costs one function call per row instead of a comprehension that
+# re-checks every value's type. DateTime columns are converted with isoformat().
+
+_serializers = {}
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def compile_serializer(model, fields):
+    columns = inspect(model).columns
+    entries = []
+    for position, field in enumerate(fields):
+        if field not in columns:
+            raise ValueError(f'{model.__name__} has no column {field!r}')
+        value = f'row[{position}]'
+        if isinstance(columns[field].type, DateTime):
+            value = f'_isoformat({value})'
+        entries.append(f'{field!r}: {value}')
+    source = f"def serialize(row):\n    return {{{', '.join(entries)}}}\n"
+    namespace = {'_isoformat': _isoformat}
+    exec(compile(source, f"<serializer {model.__name__}({', '.join(fields)})>", 'exec'), namespace)
+    return namespace['serialize']
+
+
+def serializer(model, fields):
+    # Returns the serializer for `fields` of `model`. Rows must start with those
+    # columns in that order, e.g. db.select(*field_columns(model, fields)); extra
+    # trailing columns (sort keys, search scores) are ignored.
+    key = (model, tuple(fields))
+    serialize = _serializers.get(key)
+    if serialize is None:
+        serialize = _serializers[key] = compile_serializer(model, key[1])
+    return serialize
+
+
+class JSONProvider(DefaultJSONProvider):
+    # Flask's provider with orjson doing the encoding when it is installed.
+    # Values orjson does not handle natively (and datetimes, so their format is
+    # the same as with the stdlib encoder) go through Flask's default().
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.get('indent'):
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
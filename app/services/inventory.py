@@ -0,0 +1,180 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.stock import StockBucket, StockReservation
+
+# Stock is only ever changed with conditional UPDATEs
+# (SET quantity = quantity - :q WHERE quantity >= :q), never read-check-write,
+# so two checkouts cannot both take the last unit and a checkout holds the
+# bucket row lock only for its own transaction. Spreading a hot product over
+# several buckets lets that many checkouts proceed in parallel. Nothing here
+# commits: taken units come back if the caller's transaction rolls back.
+# Bucket rows are locked in one global order (product_id, then bucket) so two
+# checkouts of the same products do not deadlock. The exception is a checkout
+# whose random first bucket ran short and goes on to the other buckets while
+# holding it; in that rare case MySQL's deadlock detection rolls one back.
+
+MAX_STRIPES = 64
+DEFAULT_RESERVATION_TTL = 600
+MAX_RESERVATION_TTL = 86400
+
+
+class OutOfStock(ValueError):
+    def __init__(self, product_id):
+        self.product_id = product_id
+        super().__init__(f'product {product_id} is out of stock')
+
+
+class ReservationError(ValueError):
+    pass
+
+
+def set_stock(product_id, quantity, stripes=1):
+    # Replaces the product's stock, split evenly over `stripes` buckets.
+    # quantity=None stops tracking stock for the product.
+    table = StockBucket.__table__
+    db.session.execute(table.delete().where(table.c.product_id == product_id))
+    if quantity is None:
+        return
+    share, extra = divmod(quantity, stripes)
+    db.session.execute(table.insert(), [
+        {'product_id': product_id, 'bucket': bucket, 'quantity': share + (1 if bucket < extra else 0)}
+        for bucket in range(stripes)
+    ])
+
+
+def stock_levels(product_ids):
+    # {product_id: (available units, buckets)} for the tracked products among product_ids
+    rows = db.session.execute(
+        db.select(StockBucket.product_id, db.func.sum(StockBucket.quantity), db.func.count())
+        .where(StockBucket.product_id.in_(product_ids))
+        .group_by(StockBucket.product_id)
+    ).all()
+    return {product_id: (int(available), buckets) for product_id, available, buckets in rows}
+
+
+def _take_from(product_id, bucket, quantity):
+    table = StockBucket.__table__
+    return db.session.execute(
+        table.update()
+        .where(table.c.product_id == product_id, table.c.bucket == bucket, table.c.quantity >= quantity)
+        .values(quantity=table.c.quantity - quantity)
+    ).rowcount == 1
+
+
+def _take(product_id, quantity, buckets):
+    # One UPDATE on a random bucket in the common case. When that bucket is
+    # short, the others are tried, and as a last resort the units are gathered
+    # from several buckets.
+    first = random.randrange(buckets)
+    if _take_from(product_id, first, quantity):
+        return [(first, quantity)]
+    available = db.session.execute(
+        db.select(StockBucket.bucket, StockBucket.quantity)
+        .where(StockBucket.product_id == product_id, StockBucket.quantity > 0)
+        .order_by(StockBucket.bucket)
+    ).all()
+    for bucket, units in available:
+        if units >= quantity and _take_from(product_id, bucket, quantity):
+            return [(bucket, quantity)]
+    taken, remaining = [], quantity
+    for bucket, units in available:
+        units = min(units, remaining)
+        if _take_from(product_id, bucket, units):
+            taken.append((bucket, units))
+            remaining -= units
+            if not remaining:
+                return taken
+    raise OutOfStock(product_id)
+
+
+def take_stock(items, levels=None):
+    # Takes the units of `items` ([(product_id, quantity), ...]) out of stock.
+    # Returns [(product_id, bucket, units), ...]; untracked products are skipped.
+    # Raises OutOfStock, after which the caller must roll back. `levels` is a
+    # stock_levels() result covering the products, to share one lookup.
+    wanted = {}
+    for product_id, quantity in items:
+        wanted[product_id] = wanted.get(product_id, 0) + quantity
+    if levels is None:
+        levels = stock_levels(wanted)
+    taken = []
+    for product_id, quantity in sorted(wanted.items()):
+        if product_id in levels:
+            taken.extend((product_id, bucket, units) for bucket, units in _take(product_id, quantity, levels[product_id][1]))
+    return taken
+
+
+def reserve(items, ttl=DEFAULT_RESERVATION_TTL):
+    # Takes the units now and holds them for `ttl` seconds; returns (reservation_id, expires_at).
+    # Raises ReservationError when no item tracks stock: there is nothing to hold.
+    # Nothing here returns expired units (that would lock other products'
+    # buckets out of order); `flask release-reservations` does, and must be
+    # scheduled, e.g. every minute from cron, or expired units stay held.
+    reservation_id = uuid.uuid4().hex
+    expires_at = datetime.now() + timedelta(seconds=ttl)
+    rows = [{'reservation_id': reservation_id, 'product_id': product_id, 'bucket': bucket, 'quantity': units,
+             'expires_at': expires_at} for product_id, bucket, units in take_stock(items)]
+    if not rows:
+        raise ReservationError('none of the items track stock, order them without a reservation')
+    db.session.execute(StockReservation.__table__.insert(), rows)
+    return reservation_id, expires_at
+
+
+def consume_reservation(reservation_id, items):
+    # Turns a live reservation into an order's stock: the reserved units per
+    # product must be exactly the order's. Raises ReservationError otherwise.
+    table = StockReservation.__table__
+    live = (table.c.reservation_id == reservation_id, table.c.expires_at > datetime.now())
+    rows = db.session.execute(db.select(table.c.product_id, table.c.quantity).where(*live)).all()
+    reserved, wanted = {}, {}
+    for product_id, quantity in rows:
+        reserved[product_id] = reserved.get(product_id, 0) + quantity
+    for product_id, quantity in items:
+        wanted[product_id] = wanted.get(product_id, 0) + quantity
+    levels = stock_levels(wanted)
+    # Every reservation holds at least one row, see reserve()
+    if not rows or reserved != {p: q for p, q in wanted.items() if p in levels}:
+        raise ReservationError(f'reservation {reservation_id} is unknown, expired or does not match the items')
+    # Conditional delete: only one order can consume it, and not once it expired
+    if db.session.execute(table.delete().where(*live)).rowcount != len(rows):
+        raise ReservationError(f'reservation {reservation_id} is unknown, expired or does not match the items')
+
+
+def _put_back(rows):
+    # Deletes reservation rows and returns their units to stock. Each row is
+    # deleted conditionally first, so a row is never returned twice.
+    reservations, buckets = StockReservation.__table__, StockBucket.__table__
+    released = 0
+    for row in rows:
+        if db.session.execute(reservations.delete().where(reservations.c.id == row.id)).rowcount != 1:
+            continue
+        released += 1
+        # Back to its bucket, or to bucket 0 if the stock was re-striped since
+        for bucket in (row.bucket, 0):
+            if db.session.execute(
+                buckets.update()
+                .where(buckets.c.product_id == row.product_id, buckets.c.bucket == bucket)
+                .values(quantity=buckets.c.quantity + row.quantity)
+            ).rowcount:
+                break
+    return released
+
+
+def release_reservation(reservation_id):
+    # Cancels a reservation; returns the number of rows released
+    return _put_back(db.session.execute(
+        db.select(StockReservation.id, StockReservation.product_id, StockReservation.bucket, StockReservation.quantity)
+        .where(StockReservation.reservation_id == reservation_id)
+    ).all())
+
+
+def release_expired(limit=500):
+    # Returns the units of up to `limit` expired reservation rows to stock
+    return _put_back(db.session.execute(
+        db.select(StockReservation.id, StockReservation.product_id, StockReservation.bucket, StockReservation.quantity)
+        .where(StockReservation.expires_at <= datetime.now())
+        .order_by(StockReservation.expires_at).limit(limit)
+    ).all())
@@ -0,0 +1,203 @@
+from datetime import datetime
+
+from app.extensions import db, leaderboard
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.query_params import parse_datetime
+from app.services.inventory import OutOfStock, ReservationError, consume_reservation, stock_levels, take_stock
+from app.serializers import serializer
+
+MAX_BATCH_ORDERS = 1000
+
+ORDER_FILTERS = {'id': int, 'customer_id': int, 'created_at': parse_datetime}
+ORDER_COLUMNS = ('id', 'customer_id', 'created_at')
+ORDER_FIELDS = ORDER_COLUMNS + ('items', 'total')
+
+
+class OrderValidationError(ValueError):
+    def __init__(self, errors):
+        # errors is a list of {'index': <position in the payload>, 'error': <message>}
+        self.errors = errors
+        super().__init__('; '.join(e['error'] for e in errors))
+
+
+class OrderConflictError(OrderValidationError):
+    # A valid order that cannot be filled: out of stock or an unusable reservation
+    pass
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _shape_error(order):
+    if not isinstance(order, dict):
+        return 'order must be an object'
+    if not _is_id(order.get('customer_id')):
+        return "'customer_id' must be a positive integer"
+    reservation_id = order.get('reservation_id')
+    if reservation_id is not None and (not isinstance(reservation_id, str) or len(reservation_id) > 32):
+        return "'reservation_id' must be a reservation id string"
+    items = order.get('items')
+    if not isinstance(items, list) or not items:
+        return "'items' must be a non-empty list"
+    for item in items:
+        if not isinstance(item, dict) or not _is_id(item.get('product_id')):
+            return "each item needs a positive integer 'product_id'"
+        if not _is_id(item.get('quantity')):
+            return "each item needs a positive integer 'quantity'"
+    return None
+
+
+def validate_orders(orders):
+    # Checks the payload shape, then every referenced customer and product
+    # with one IN query per table, however many orders are in the batch.
+    errors = []
+    valid = []
+    for index, order in enumerate(orders):
+        error = _shape_error(order)
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            valid.append((index, order))
+
+    customer_ids = {order['customer_id'] for _, order in valid}
+    product_ids = {item['product_id'] for _, order in valid for item in order['items']}
+    known_customers = set()
+    known_products = set()
+    if customer_ids:
+        known_customers = set(db.session.scalars(db.select(Customer.id).where(Customer.id.in_(customer_ids))))
+    if product_ids:
+        known_products = set(db.session.scalars(db.select(Product.id).where(Product.id.in_(product_ids))))
+
+    for index, order in valid:
+        if order['customer_id'] not in known_customers:
+            errors.append({'index': index, 'error': f"customer {order['customer_id']} does not exist"})
+            continue
+        missing = sorted({i['product_id'] for i in order['items']} - known_products)
+        if missing:
+            errors.append({'index': index, 'error': f'products {missing} do not exist'})
+
+    errors.sort(key=lambda e: e['index'])
+    return errors
+
+
+def _take_stock(orders):
+    # Stock for every order, with one stock lookup for the whole batch. An
+    # order holding a reservation consumes it instead of taking stock again.
+    # The other orders take their stock in a single take_stock() call, so the
+    # batch locks bucket rows in product order like a single order does.
+    levels = stock_levels({item['product_id'] for order in orders for item in order['items']})
+    items = []
+    for index, order in enumerate(orders):
+        order_items = [(item['product_id'], item['quantity']) for item in order['items']]
+        if order.get('reservation_id'):
+            try:
+                consume_reservation(order['reservation_id'], order_items)
+            except ReservationError as e:
+                raise OrderConflictError([{'index': index, 'error': str(e)}])
+        else:
+            items.extend(order_items)
+    if not (levels and items):
+        return
+    try:
+        take_stock(items, levels)
+    except OutOfStock as e:
+        raise OrderConflictError([
+            {'index': index, 'error': str(e)} for index, order in enumerate(orders)
+            if not order.get('reservation_id') and any(item['product_id'] == e.product_id for item in order['items'])
+        ])
+
+
+def insert_orders(orders):
+    # Takes stock, then writes orders and their items with set-based INSERTs.
+    # Does not commit; raises OrderConflictError when stock is short.
+    _take_stock(orders)
+    now = datetime.now()
+    order_rows = [{'customer_id': order['customer_id'], 'created_at': now} for order in orders]
+
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        order_ids = list(db.session.scalars(
+            db.insert(Order).returning(Order.id, sort_by_parameter_order=True), order_rows
+        ))
+    else:
+        # No RETURNING for executemany (e.g. MySQL): one INSERT per order header,
+        # the items below are still written in a single executemany.
+        order_ids = [
+            db.session.execute(db.insert(Order).values(**row)).inserted_primary_key[0]
+            for row in order_rows
+        ]
+
+    # Items keep the price they were ordered at, so repricing a product does
+    # not rewrite order totals or sales history
+    prices = dict(db.session.execute(db.select(Product.id, Product.price).where(
+        Product.id.in_({item['product_id'] for order in orders for item in order['items']})
+    )).all())
+    item_rows = [
+        {'order_id': order_id, 'product_id': item['product_id'], 'quantity': item['quantity'],
+         'unit_price': prices.get(item['product_id']), 'created_at': now}
+        for order_id, order in zip(order_ids, orders)
+        for item in order['items']
+    ]
+    db.session.execute(db.insert(OrderItem), item_rows)
+    leaderboard.stage([(row['order_id'], row['product_id'], row['quantity']) for row in item_rows], now)  # counted on commit
+    return order_ids
+
+
+def select_orders(fields=ORDER_FIELDS):
+    # Column-only select of the requested header columns, in order, followed by
+    # the id when it was not requested because items are matched to it.
+    columns = [getattr(Order, f) for f in fields if f in ORDER_COLUMNS]
+    if 'id' not in fields:
+        columns.append(Order.id)
+    return db.select(*columns)
+
+
+def serialize_orders(rows, fields=ORDER_FIELDS):
+    # Items for the whole page come from one column-only SELECT ... IN joined to
+    # their products, so reading orders costs a fixed number of queries.
+    items_by_order = {}
+    if rows and ('items' in fields or 'total' in fields):
+        query = db.select(
+            OrderItem.order_id, OrderItem.id, OrderItem.product_id, OrderItem.quantity, Product.name,
+            db.func.coalesce(OrderItem.unit_price, Product.price).label('price')
+        ).outerjoin(Product, Product.id == OrderItem.product_id).where(
+            OrderItem.order_id.in_([row.id for row in rows])
+        ).order_by(OrderItem.order_id, OrderItem.id)
+        for item in db.session.execute(query):
+            items_by_order.setdefault(item.order_id, []).append({
+                'id': item.id,
+                'product_id': item.product_id,
+                'product_name': item.name,
+                'unit_price': item.price,
+                'quantity': item.quantity,
+                'line_total': item.quantity * item.price if item.price is not None else None
+            })
+
+    to_dict = serializer(Order, [f for f in fields if f in ORDER_COLUMNS])
+    orders = []
+    for row in rows:
+        items = items_by_order.get(row.id, [])
+        order = to_dict(row)
+        if 'items' in fields:
+            order['items'] = items
+        if 'total' in fields:
+            order['total'] = sum(item['line_total'] or 0 for item in items)
+        orders.append(order)
+    return orders
+
+
+def create_orders(orders):
+    errors = validate_orders(orders)
+    if errors:
+        raise OrderValidationError(errors)
+    try:
+        order_ids = insert_orders(orders)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return order_ids
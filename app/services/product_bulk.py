@@ -0,0 +1,166 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.category_stats import apply_product_changes
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_tombstone import ProductTombstone
+from app.models.stock import StockBucket, StockReservation
+
+# Set-based bulk writes on products. The selection (an id list and/or list
+# filters) is walked in id order, chunk_size ids at a time, and each chunk is
+# one UPDATE/DELETE ... WHERE id IN (...) committed on its own, so locks are
+# held for one chunk and a failed chunk does not undo the ones before it.
+# The side tables the ORM listeners would maintain per row (category_stats,
+# tombstones, stock) are written per chunk alongside.
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+MAX_IDS = 10000
+BULK_COLUMNS = ('name', 'price', 'description', 'category_id')
+
+
+class BulkError(ValueError):
+    pass
+
+
+def parse_ids(value):
+    if value is None:
+        return None
+    if (not isinstance(value, list) or not 1 <= len(value) <= MAX_IDS
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in value)):
+        raise BulkError(f"'ids' must be a list of 1 to {MAX_IDS} integers")
+    return sorted(set(value))
+
+
+def clean_values(values, price_factor=None):
+    # Validates the columns a bulk update sets; returns them as a dict
+    if values is None:
+        values = {}
+    if not isinstance(values, dict):
+        raise BulkError("'set' must be an object")
+    unknown = set(values) - set(BULK_COLUMNS)
+    if unknown:
+        raise BulkError(f"Cannot set {', '.join(sorted(unknown))}; settable columns are {', '.join(BULK_COLUMNS)}")
+    if 'name' in values:
+        name = values['name']
+        if not isinstance(name, str) or not name.strip() or len(name) > 100:
+            raise BulkError("'name' must be a non-empty string of at most 100 characters")
+    if 'price' in values:
+        price = values['price']
+        if not isinstance(price, (int, float)) or isinstance(price, bool) or price < 0:
+            raise BulkError("'price' must be a non-negative number")
+    if 'description' in values:
+        description = values['description']
+        if description is not None and (not isinstance(description, str) or len(description) > 255):
+            raise BulkError("'description' must be a string of at most 255 characters")
+    if values.get('category_id') is not None:
+        category_id = values['category_id']
+        if (not isinstance(category_id, int) or isinstance(category_id, bool)
+                or db.session.scalar(db.select(Category.id).where(Category.id == category_id)) is None):
+            raise BulkError(f'category {category_id} does not exist')
+
+    if price_factor is not None:
+        if not isinstance(price_factor, (int, float)) or isinstance(price_factor, bool) or price_factor < 0:
+            raise BulkError("'price_factor' must be a non-negative number")
+        if 'price' in values:
+            raise BulkError("Use either 'price' or 'price_factor', not both")
+    if not values and price_factor is None:
+        raise BulkError("Nothing to update; supply 'set' and/or 'price_factor'")
+    return values
+
+
+def _chunks(ids, where, chunk_size):
+    # Lists of at most chunk_size ids, ascending. An id list is sliced as is;
+    # a filter is walked by keyset on id, so rows the previous chunk moved out
+    # of (or into) the filter are neither revisited nor skipped.
+    if ids is not None:
+        for start in range(0, len(ids), chunk_size):
+            yield ids[start:start + chunk_size]
+        return
+    last = None
+    while True:
+        query = db.select(Product.id).where(*where).order_by(Product.id).limit(chunk_size)
+        if last is not None:
+            query = query.where(Product.id > last)
+        chunk = db.session.scalars(query).all()
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def _run(ids, where, chunk_size, write_chunk, count_key):
+    chunks = []
+    for chunk in _chunks(ids, where, chunk_size):
+        summary = {'chunk': len(chunks) + 1, 'ids': len(chunk), count_key: 0}
+        try:
+            summary[count_key] = write_chunk([Product.id.in_(chunk), *where])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            summary['error'] = f'chunk not written: {getattr(e, "orig", e)}'
+        chunks.append(summary)
+    return {count_key: sum(c[count_key] for c in chunks), 'chunks': chunks}
+
+
+def bulk_update_products(values, price_factor=None, ids=None, where=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    # Sets `values` (already cleaned) and/or multiplies the price by
+    # price_factor on the selected products. Returns the updated count, total
+    # and per chunk.
+    set_ = dict(values, version=Product.version + 1)
+    if price_factor is not None:
+        set_['price'] = Product.price * price_factor
+    moves_stats = 'price' in set_ or 'category_id' in set_
+
+    def write_chunk(conditions):
+        before = []
+        if moves_stats:
+            before = db.session.execute(
+                db.select(Product.id, Product.category_id, Product.price).where(*conditions).with_for_update()
+            ).all()
+            if not before:
+                return 0
+            conditions = [Product.id.in_([row.id for row in before])]
+        updated = db.session.execute(
+            db.update(Product).where(*conditions).values(**set_).execution_options(synchronize_session=False)
+        ).rowcount
+        if moves_stats:
+            after = db.session.execute(
+                db.select(Product.category_id, Product.price).where(Product.id.in_([row.id for row in before]))
+            ).all()
+            apply_product_changes(db.session.connection(), removed=[row[1:] for row in before], added=after)
+        return updated
+
+    return _run(ids, where, chunk_size, write_chunk, 'updated')
+
+
+def bulk_delete_products(ids=None, where=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    # Deletes the selected products that no order refers to; those with order
+    # items are kept (they are part of order history). Stock rows go with the
+    # product and a tombstone is written for the changes feed. Returns the
+    # deleted count, total and per chunk.
+    has_orders = db.exists().where(OrderItem.product_id == Product.id)
+
+    def write_chunk(conditions):
+        rows = db.session.execute(
+            db.select(Product.id, Product.sku, Product.category_id, Product.price)
+            .where(*conditions, ~has_orders).with_for_update()
+        ).all()
+        if not rows:
+            return 0
+        doomed = [row.id for row in rows]
+        deleted = db.session.execute(
+            db.delete(Product).where(Product.id.in_(doomed)).execution_options(synchronize_session=False)
+        ).rowcount
+        connection = db.session.connection()
+        now = datetime.now()
+        connection.execute(ProductTombstone.__table__.insert(),
+                           [{'product_id': row.id, 'sku': row.sku, 'deleted_at': now} for row in rows])
+        connection.execute(StockBucket.__table__.delete().where(StockBucket.product_id.in_(doomed)))
+        connection.execute(StockReservation.__table__.delete().where(StockReservation.product_id.in_(doomed)))
+        apply_product_changes(connection, removed=[(row.category_id, row.price) for row in rows])
+        return deleted
+
+    return _run(ids, where, chunk_size, write_chunk, 'deleted')
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.models.product import Product
+from app.models.product_tombstone import ProductTombstone
+from app.query_params import QueryParamError, decode_cursor, encode_cursor, field_columns
+from app.serializers import serializer
+
+# The feed merges two keyset scans: products on (updated_at, id) and
+# tombstones on (deleted_at, id), both indexed, so a sync reads only the rows
+# changed since the cursor. The cursor holds the last position in each scan.
+
+
+def parse_since(token):
+    if not token:
+        return None, None
+    values = decode_cursor(token, 'since')
+    # [[updated_at, id] or null, [deleted_at, id] or null]
+    if not (isinstance(values, list) and len(values) == 2
+            and all(v is None or isinstance(v, list) and len(v) == 2 for v in values)):
+        raise QueryParamError("'since' is not a valid cursor")
+    try:
+        updated, deleted = [(datetime.fromisoformat(v[0]), int(v[1])) if v else None for v in values]
+    except (TypeError, ValueError):
+        raise QueryParamError("'since' is not a valid cursor")
+    return updated, deleted
+
+
+def _after(timestamp_column, id_column, position):
+    if position is None:
+        return True
+    timestamp, last_id = position
+    return or_(timestamp_column > timestamp, and_(timestamp_column == timestamp, id_column > last_id))
+
+
+def product_changes(since, limit, fields):
+    # Returns up to `limit` changes after `since` (a cursor from parse_since),
+    # oldest first, with the cursor to resume from and whether more are waiting.
+    updated, deleted = since
+    horizon = datetime.now() - timedelta(seconds=current_app.config.get('CHANGES_SETTLE_SECONDS', 5))
+
+    upserts = db.session.execute(
+        db.select(*field_columns(Product, fields), Product.updated_at, Product.id)
+        .where(Product.updated_at <= horizon, _after(Product.updated_at, Product.id, updated))
+        .order_by(Product.updated_at, Product.id).limit(limit + 1)
+    ).all()
+    deletes = db.session.execute(
+        db.select(ProductTombstone.id, ProductTombstone.product_id, ProductTombstone.sku, ProductTombstone.deleted_at)
+        .where(ProductTombstone.deleted_at <= horizon,
+               _after(ProductTombstone.deleted_at, ProductTombstone.id, deleted))
+        .order_by(ProductTombstone.deleted_at, ProductTombstone.id).limit(limit + 1)
+    ).all()
+
+    merged = sorted(
+        [(row.updated_at, 0, row.id, row) for row in upserts] +
+        [(row.deleted_at, 1, row.id, row) for row in deletes]
+    )
+    to_dict = serializer(Product, fields)
+    changes = []
+    for timestamp, kind, row_id, row in merged[:limit]:
+        if kind == 0:
+            updated = (timestamp, row_id)
+            changes.append({'op': 'upsert', 'product': to_dict(row), 'updated_at': timestamp.isoformat()})
+        else:
+            deleted = (timestamp, row_id)
+            changes.append({'op': 'delete', 'id': row.product_id, 'sku': row.sku, 'deleted_at': timestamp.isoformat()})
+
+    next_cursor = encode_cursor([[p[0].isoformat(), p[1]] if p else None for p in (updated, deleted)])
+    return {'changes': changes, 'next': next_cursor, 'has_more': len(merged) > limit}
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import math
+from datetime import datetime
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.category_stats import apply_product_changes
+from app.models.product import Product
+from app.upsert import upsert
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+MAX_ERRORS_PER_CHUNK = 20
+UPSERT_COLUMNS = ('name', 'price', 'description', 'category_id')
+
+
+class RowError(ValueError):
+    pass
+
+
+def iter_records(stream, fmt):
+    # Yields (line_number, record or parse error) without reading the whole body
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, RowError('invalid JSON')
+
+
+def clean_record(record, category_ids, require_sku):
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise RowError('record must be an object')
+
+    name = record.get('name')
+    if not isinstance(name, str) or not name.strip() or len(name) > 100:
+        raise RowError("'name' must be a non-empty string of at most 100 characters")
+    # CSV cells arrive as strings, NDJSON values as JSON types
+    price = record.get('price')
+    try:
+        price = float(price) if not isinstance(price, bool) else None
+    except (TypeError, ValueError):
+        price = None
+    if price is None or not math.isfinite(price):
+        raise RowError("'price' must be a number")
+    if price < 0:
+        raise RowError("'price' must not be negative")
+    category_id = record.get('category_id')
+    if isinstance(category_id, str) and category_id.strip().isdigit():
+        category_id = int(category_id)
+    if not isinstance(category_id, int) or isinstance(category_id, bool):
+        raise RowError("'category_id' must be an integer")
+    if category_id not in category_ids:
+        raise RowError(f'category {category_id} does not exist')
+    description = record.get('description') or None
+    if description is not None and (not isinstance(description, str) or len(description) > 255):
+        raise RowError("'description' must be a string of at most 255 characters")
+    sku = record.get('sku') or None
+    if sku is not None and (not isinstance(sku, str) or len(sku) > 64):
+        raise RowError("'sku' must be a string of at most 64 characters")
+    if require_sku and sku is None:
+        raise RowError("'sku' is required for upserts")
+
+    return {'name': name, 'price': price, 'description': description, 'category_id': category_id, 'sku': sku}
+
+
+def _write_chunk(rows, do_upsert):
+    now = datetime.now()
+    for row in rows:
+        row['created_at'] = row['updated_at'] = now
+    replaced = []
+    if do_upsert:
+        # A SKU repeated within the chunk is written once, with its last row;
+        # otherwise the earlier rows' values would stay in the category stats
+        rows = list({row['sku']: row for row in rows}.values())
+        # Rows about to be overwritten, so their old values leave the category stats
+        replaced = db.session.execute(db.select(Product.category_id, Product.price)
+                                      .where(Product.sku.in_([row['sku'] for row in rows]))).all()
+        stmt = upsert(db.session.get_bind().dialect.name, Product.__table__, ['sku'],
+                      lambda new: {**{c: new[c] for c in UPSERT_COLUMNS}, 'updated_at': now,
+                                           'version': Product.__table__.c.version + 1})
+    else:
+        stmt = Product.__table__.insert()
+    db.session.execute(stmt, rows)
+    apply_product_changes(db.session.connection(), removed=replaced,
+                          added=[(row['category_id'], row['price']) for row in rows])
+    db.session.commit()
+
+
+def import_products(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE, do_upsert=False):
+    # Parses, validates and writes the stream one chunk at a time, committing
+    # each chunk. Returns a summary of accepted and rejected rows per chunk.
+    category_ids = set(db.session.scalars(db.select(Category.id)))
+    chunks = []
+
+    def flush(rows, errors):
+        summary = {'chunk': len(chunks) + 1, 'accepted': 0, 'rejected': len(errors), 'errors': errors[:MAX_ERRORS_PER_CHUNK]}
+        if rows:
+            try:
+                _write_chunk(rows, do_upsert)
+                summary['accepted'] = len(rows)
+            except Exception as e:
+                db.session.rollback()
+                summary['rejected'] += len(rows)
+                summary['errors'].append({'line': None, 'error': f"chunk not written: {getattr(e, 'orig', e)}"})
+        chunks.append(summary)
+
+    rows, errors, seen = [], [], 0
+    for line_number, record in iter_records(stream, fmt):
+        try:
+            rows.append(clean_record(record, category_ids, do_upsert))
+        except RowError as e:
+            errors.append({'line': line_number, 'error': str(e)})
+        seen += 1
+        if seen == chunk_size:
+            flush(rows, errors)
+            rows, errors, seen = [], [], 0
+    if seen:
+        flush(rows, errors)
+
+    return {
+        'accepted': sum(c['accepted'] for c in chunks),
+        'rejected': sum(c['rejected'] for c in chunks),
+        'chunks': chunks
+    }
@@ -0,0 +1,149 @@
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+
+from app.extensions import db
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.sales_rollup import RollupWatermark, SalesDaily, SalesDailyCategory, SalesDailyProduct
+from app.upsert import upsert
+
+WATERMARK = 'sales'
+DEFAULT_BATCH_SIZE = 10000
+REPORT_GROUPS = ('day', 'product', 'category')
+
+
+class ReportError(ValueError):
+    pass
+
+
+def _add(totals, key, units, revenue):
+    current = totals.get(key, (0, 0.0))
+    totals[key] = (current[0] + units, current[1] + revenue)
+
+
+def _increment(table, keys, rows):
+    # Adds the batch's units and revenue onto existing rollup rows, or creates them
+    if not rows:
+        return
+    stmt = upsert(db.session.get_bind().dialect.name, table, keys, lambda new: {
+        'units': table.c.units + new.units,
+        'revenue': table.c.revenue + new.revenue,
+    })
+    db.session.execute(stmt, rows)
+
+
+def rollup_batch(batch_size=DEFAULT_BATCH_SIZE):
+    # Folds the next batch of order items after the watermark into the rollups
+    # and moves the watermark, in one transaction. The batch stops at the first
+    # item newer than the settle lag: it and everything after it wait for the
+    # next run, so a transaction still committing with a lower id is not
+    # skipped. Items without created_at have no day to count on and are passed
+    # over. Revenue uses the price the item was ordered at. Returns the number
+    # of items rolled up.
+    horizon = datetime.now() - timedelta(seconds=current_app.config.get('ROLLUP_SETTLE_SECONDS', 30))
+    last_id = db.session.scalar(db.select(RollupWatermark.last_id).where(RollupWatermark.name == WATERMARK))
+    if last_id is None:
+        db.session.add(RollupWatermark(name=WATERMARK, last_id=0))
+        db.session.commit()
+        last_id = 0
+
+    items = db.session.execute(
+        db.select(OrderItem.id, OrderItem.created_at, OrderItem.product_id, OrderItem.quantity,
+                  Product.category_id, db.func.coalesce(OrderItem.unit_price, Product.price).label('price'))
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.id > last_id, OrderItem.created_at.isnot(None))
+        .order_by(OrderItem.id).limit(batch_size)
+    ).all()
+    for position, item in enumerate(items):
+        if item.created_at > horizon:
+            items = items[:position]
+            break
+    if not items:
+        return 0
+
+    # Claim the range first: a concurrent run finds the watermark moved and backs off
+    claimed = db.session.execute(
+        db.update(RollupWatermark)
+        .where(RollupWatermark.name == WATERMARK, RollupWatermark.last_id == last_id)
+        .values(last_id=items[-1].id)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return 0
+
+    daily, per_product, per_category = {}, {}, {}
+    for item in items:
+        day = item.created_at.date()
+        revenue = item.quantity * item.price if item.price is not None else 0.0
+        _add(daily, day, item.quantity, revenue)
+        if item.product_id is not None:
+            _add(per_product, (day, item.product_id), item.quantity, revenue)
+        if item.category_id is not None:
+            _add(per_category, (day, item.category_id), item.quantity, revenue)
+
+    try:
+        _increment(SalesDaily.__table__, ['day'], [
+            {'day': day, 'units': u, 'revenue': r} for day, (u, r) in daily.items()
+        ])
+        _increment(SalesDailyProduct.__table__, ['day', 'product_id'], [
+            {'day': day, 'product_id': p, 'units': u, 'revenue': r} for (day, p), (u, r) in per_product.items()
+        ])
+        _increment(SalesDailyCategory.__table__, ['day', 'category_id'], [
+            {'day': day, 'category_id': c, 'units': u, 'revenue': r} for (day, c), (u, r) in per_category.items()
+        ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(items)
+
+
+def rollup_sales(batch_size=DEFAULT_BATCH_SIZE):
+    # Catches the rollups up with order_items; returns the number of items folded in
+    total = 0
+    while True:
+        count = rollup_batch(batch_size)
+        total += count
+        if count < batch_size:
+            return total
+
+
+def parse_day(name, value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ReportError(f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+def sales_report(since, until, group_by, limit):
+    # Reads only rollup rows: `since` inclusive, `until` exclusive
+    model, key = {
+        'day': (SalesDaily, SalesDaily.day),
+        'product': (SalesDailyProduct, SalesDailyProduct.product_id),
+        'category': (SalesDailyCategory, SalesDailyCategory.category_id),
+    }[group_by]
+    name = key.key
+    units, revenue = db.func.sum(model.units), db.func.sum(model.revenue)
+    query = db.select(key, units, revenue).group_by(key)
+    if since is not None:
+        query = query.where(model.day >= since)
+    if until is not None:
+        query = query.where(model.day < until)
+    query = query.order_by(key) if group_by == 'day' else query.order_by(revenue.desc(), key)
+
+    rows = db.session.execute(query.limit(limit)).all()
+    watermark = db.session.scalar(db.select(RollupWatermark.last_id).where(RollupWatermark.name == WATERMARK))
+    return {
+        'group_by': group_by,
+        'from': since.isoformat() if since else None,
+        'to': until.isoformat() if until else None,
+        'rows': [{
+            name: value.isoformat() if group_by == 'day' else value,
+            'units': int(u),
+            'revenue': round(r, 2)
+        } for value, u, r in rows],
+        'as_of_order_item_id': watermark or 0
+    }
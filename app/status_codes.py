@@ -1,10 +1,13 @@
 HTTP_200_OK = 200
 HTTP_201_CREATED = 201
 HTTP_202_ACCEPTED = 202
+HTTP_304_NOT_MODIFIED = 304
 HTTP_400_BAD_REQUEST = 400
 HTTP_401_UNAUTHORIZED = 401
 HTTP_409_CONFLICT = 409
+HTTP_422_UNPROCESSABLE_ENTITY = 422
 HTTP_404_NOT_FOUND = 404
 HTTP_404_NOT_FOUND = 404
 HTTP_403_FORBIDDEN = 403
 HTTP_500_INTERNAL_SERVER_ERROR = 500
+HTTP_503_SERVICE_UNAVAILABLE = 503
@@ -0,0 +1,14 @@
+from sqlalchemy.dialects import mysql, sqlite
+
+
+def upsert(dialect_name, table, key_columns, set_):
+    # INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE (SQLite).
+    # set_(new) returns the columns to update, where `new` holds the values of
+    # the row that failed to insert.
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(set_(stmt.inserted))
+    if dialect_name == 'sqlite':
+        stmt = sqlite.insert(table)
+        return stmt.on_conflict_do_update(index_elements=key_columns, set_=set_(stmt.excluded))
+    raise NotImplementedError(f'upsert is not supported on {dialect_name}')
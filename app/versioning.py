@@ -0,0 +1,76 @@
+from flask import jsonify, request
+
+from app.extensions import db
+
+# Optimistic concurrency for PUT. Versioned rows carry a `version` column that
+# every update increments; an item GET returns it as the ETag and a PUT may
+# send it back in If-Match. The update is a single
+#   UPDATE ... SET <supplied fields>, version = version + 1
+#   WHERE id = :id [AND version = :expected]
+# so the common case costs one statement; only when no row matched is the row
+# looked up, to tell a missing row (404) from a stale version (409).
+
+
+class RowNotFound(LookupError):
+    pass
+
+
+class VersionConflict(Exception):
+    def __init__(self, current):
+        super().__init__(f'version {current} is current')
+        self.current = current
+
+
+def if_match_version():
+    # The version named by `If-Match: "<version>"`, or None when the header is
+    # absent or `*`. Raises ValueError for anything else.
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    tags = if_match.as_set()
+    if len(tags) != 1 or not next(iter(tags)).isdigit():
+        raise ValueError('If-Match must be a single version ETag, e.g. "3"')
+    return int(next(iter(tags)))
+
+
+def update_values(data, fields):
+    # The supplied subset of `fields` from a PUT body; only those are written
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    values = {field: data[field] for field in fields if field in data}
+    if not values:
+        raise ValueError(f"Nothing to update; supply any of {', '.join(fields)}")
+    return values
+
+
+def versioned_update(model, row_id, values, expected=None):
+    # Applies `values` to row `row_id` of `model` and returns its new version.
+    # Raises RowNotFound or VersionConflict when nothing matched.
+    stmt = (db.update(model).where(model.id == row_id)
+            .values(**values, version=model.version + 1)
+            .execution_options(synchronize_session=False))
+    if expected is not None:
+        stmt = stmt.where(model.version == expected)
+
+    if db.session.get_bind(mapper=model).dialect.update_returning:
+        version = db.session.execute(stmt.returning(model.version)).scalar()
+        matched = version is not None
+    else:
+        matched = db.session.execute(stmt).rowcount > 0
+        version = expected + 1 if expected is not None else None
+        if matched and version is None:
+            # No RETURNING (MySQL): read back the version this transaction wrote
+            version = db.session.scalar(db.select(model.version).where(model.id == row_id))
+    if matched:
+        return version
+
+    current = db.session.scalar(db.select(model.version).where(model.id == row_id))
+    if current is None:
+        raise RowNotFound(row_id)
+    raise VersionConflict(current)
+
+
+def updated_response(message, version):
+    response = jsonify({'message': message, 'version': version})
+    response.set_etag(str(version))
+    return response
@@ -1,6 +1,79 @@
+import os
 from datetime import timedelta
 
+def env_int(name, default):
+     return int(os.environ.get(name, default))
+
+def env_bool(name, default):
+     return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
 class Config:
-     SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://root:@localhost/e_commerce_db'
+     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'mysql+pymysql://root:@localhost/e_commerce_db')
      JWT_SECRET_KEY = "exam" 
      JWT_EXPIRATION_DELTA = timedelta(minutes=10)
+
+     # Connection pool (see app/pool.py), overridable per environment
+     DB_POOL_SIZE = env_int('DB_POOL_SIZE', 10)
+     DB_MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 20)
+     DB_POOL_TIMEOUT = env_int('DB_POOL_TIMEOUT', 10)
+     DB_POOL_RECYCLE = env_int('DB_POOL_RECYCLE', 1800)  # below MySQL's wait_timeout
+     DB_POOL_PRE_PING = env_bool('DB_POOL_PRE_PING', True)
+
+     # Read replicas for GET traffic (see app/replicas.py), comma separated URLs
+     DATABASE_REPLICA_URLS = [u for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u]
+     DB_REPLICA_PIN_SECONDS = env_int('DB_REPLICA_PIN_SECONDS', 5)  # longer than the replication lag
+     DB_REPLICA_CHECK_SECONDS = env_int('DB_REPLICA_CHECK_SECONDS', 5)
+     DB_REPLICA_RETRY_SECONDS = env_int('DB_REPLICA_RETRY_SECONDS', 30)
+
+     # Request/SQL instrumentation served on /metrics
+     METRICS_ENABLED = env_bool('METRICS_ENABLED', True)
+     METRICS_SERVER_TIMING = env_bool('METRICS_SERVER_TIMING', False)
+
+     # In-process cache for catalog responses
+     CACHE_ENABLED = True
+     CACHE_MAX_ENTRIES = 1024
+     CACHE_TTL_SECONDS = 60
+
+     # Rows written less than this long ago are held back from the changes feed
+     # so transactions still committing are not skipped by a client's cursor
+     CHANGES_SETTLE_SECONDS = env_int('CHANGES_SETTLE_SECONDS', 5)
+
+     # Async order intake (app/order_intake.py): POST /api/v1/orders/ answers 202
+     # with a ticket and a pool of writers commits queued orders in batches
+     ORDER_INTAKE_ASYNC = env_bool('ORDER_INTAKE_ASYNC', False)
+     ORDER_INTAKE_QUEUE_SIZE = env_int('ORDER_INTAKE_QUEUE_SIZE', 10000)
+     ORDER_INTAKE_WORKERS = env_int('ORDER_INTAKE_WORKERS', 2)
+     ORDER_INTAKE_BATCH_SIZE = env_int('ORDER_INTAKE_BATCH_SIZE', 100)
+     ORDER_INTAKE_BATCH_WAIT_MS = env_int('ORDER_INTAKE_BATCH_WAIT_MS', 20)
+     ORDER_INTAKE_TICKET_TTL_SECONDS = 3600
+
+     # Idempotency-Key on POST /api/v1/orders/ (app/idempotency.py)
+     IDEMPOTENCY_TTL_SECONDS = env_int('IDEMPOTENCY_TTL_SECONDS', 86400)
+     IDEMPOTENCY_CACHE_ENTRIES = 10000
+     # How long a claimed key stays locked without a response before a retry may take it over
+     IDEMPOTENCY_LEASE_SECONDS = env_int('IDEMPOTENCY_LEASE_SECONDS', 60)
+
+     # Order items younger than this wait for the next `flask rollup-sales` run
+     ROLLUP_SETTLE_SECONDS = env_int('ROLLUP_SETTLE_SECONDS', 30)
+
+     # Top-sellers leaderboard (app/leaderboard.py): board size per category and
+     # how often the in-memory counters are reloaded from order_items
+     LEADERBOARD_TOP_K = env_int('LEADERBOARD_TOP_K', 100)
+     LEADERBOARD_RECONCILE_SECONDS = env_int('LEADERBOARD_RECONCILE_SECONDS', 300)
+
+class DevelopmentConfig(Config):
+     DB_POOL_SIZE = env_int('DB_POOL_SIZE', 5)
+     DB_MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 5)
+
+class ProductionConfig(Config):
+     DB_POOL_SIZE = env_int('DB_POOL_SIZE', 20)
+     DB_MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 30)
+     DB_POOL_TIMEOUT = env_int('DB_POOL_TIMEOUT', 5)
+
+class TestingConfig(Config):
+     TESTING = True
+     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+     CACHE_ENABLED = False
+     DATABASE_REPLICA_URLS = []
+     CHANGES_SETTLE_SECONDS = 0
+     ROLLUP_SETTLE_SECONDS = 0
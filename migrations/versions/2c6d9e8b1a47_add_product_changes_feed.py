@@ -0,0 +1,43 @@
+"""add product changes feed
+
+Revision ID: 2c6d9e8b1a47
+Revises: e93a6c1d7f28
+Create Date: 2026-10-18 15:12:40.318906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c6d9e8b1a47'
+down_revision = 'e93a6c1d7f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('sku', sa.String(length=64), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_product_tombstones_deleted_at_id', ['deleted_at', 'id'], unique=False)
+
+    # Rows never updated have no updated_at; the feed starts them at created_at
+    op.execute('UPDATE products SET updated_at = created_at WHERE updated_at IS NULL')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_updated_at_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_updated_at_id')
+
+    with op.batch_alter_table('product_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_tombstones_deleted_at_id')
+
+    op.drop_table('product_tombstones')
@@ -0,0 +1,47 @@
+"""add row versions for optimistic concurrency
+
+Revision ID: 3d8f0b6a5e72
+Revises: f61b3d9a2c57
+Create Date: 2026-10-18 21:14:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8f0b6a5e72'
+down_revision = 'f61b3d9a2c57'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('products', 'categories', 'customers')
+
+# Dropping a column on SQLite rebuilds the table, which drops its triggers;
+# these are the FTS sync triggers of 5b8e04d1f9a2
+SQLITE_FTS_TRIGGERS = (
+    "CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+
+def upgrade():
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in reversed(VERSIONED_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('products_fts_au', 'products_fts_ad', 'products_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
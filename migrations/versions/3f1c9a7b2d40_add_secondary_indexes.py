@@ -0,0 +1,50 @@
+"""add secondary indexes
+
+Revision ID: 3f1c9a7b2d40
+Revises: 8d7eb5479e56
+Create Date: 2026-10-18 09:12:44.310215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7b2d40'
+down_revision = '8d7eb5479e56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.create_index('ix_customers_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_customer_id_id', ['customer_id', 'id'], unique=False)
+        batch_op.create_index('ix_orders_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_category_id_id', ['category_id', 'id'], unique=False)
+        batch_op.create_index('ix_products_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.create_index('ix_order_items_order_id', ['order_id'], unique=False)
+        batch_op.create_index('ix_order_items_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_items_created_at')
+        batch_op.drop_index('ix_order_items_order_id')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_created_at')
+        batch_op.drop_index('ix_products_category_id_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_created_at')
+        batch_op.drop_index('ix_orders_customer_id_id')
+
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_index('ix_customers_created_at')
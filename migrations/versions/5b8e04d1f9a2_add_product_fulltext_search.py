@@ -0,0 +1,49 @@
+"""add product full-text search
+
+Revision ID: 5b8e04d1f9a2
+Revises: c7e25f0a8d61
+Create Date: 2026-10-18 12:41:33.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e04d1f9a2'
+down_revision = 'c7e25f0a8d61'
+branch_labels = None
+depends_on = None
+
+# Same statements as PRODUCTS_FTS_DDL in app/models/product.py
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE products_fts USING fts5(name, description, content='products', content_rowid='id')",
+    "CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    # index the rows that already exist
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ix_products_fulltext', 'products', ['name', 'description'], unique=False, mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ix_products_fulltext', table_name='products')
+    elif dialect == 'sqlite':
+        for trigger in ('products_fts_au', 'products_fts_ad', 'products_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS products_fts')
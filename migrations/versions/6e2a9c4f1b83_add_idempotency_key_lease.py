@@ -0,0 +1,26 @@
+"""add a lease to idempotency key claims
+
+Revision ID: 6e2a9c4f1b83
+Revises: 3d8f0b6a5e72
+Create Date: 2026-10-18 23:02:17.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2a9c4f1b83'
+down_revision = '3d8f0b6a5e72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('locked_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_column('locked_until')
@@ -0,0 +1,36 @@
+"""add category stats
+
+Revision ID: 7a3f5c2e9d14
+Revises: 2c6d9e8b1a47
+Create Date: 2026-10-18 16:03:27.540112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3f5c2e9d14'
+down_revision = '2c6d9e8b1a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('category_stats',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('price_sum', sa.Float(), nullable=False),
+    sa.Column('min_price', sa.Float(), nullable=True),
+    sa.Column('max_price', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('category_id')
+    )
+    op.execute(
+        'INSERT INTO category_stats (category_id, product_count, price_sum, min_price, max_price) '
+        'SELECT category_id, COUNT(*), SUM(price), MIN(price), MAX(price) FROM products '
+        'WHERE category_id IS NOT NULL GROUP BY category_id'
+    )
+
+
+def downgrade():
+    op.drop_table('category_stats')
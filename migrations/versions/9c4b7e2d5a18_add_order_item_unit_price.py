@@ -0,0 +1,29 @@
+"""snapshot the unit price on order items
+
+Revision ID: 9c4b7e2d5a18
+Revises: 6e2a9c4f1b83
+Create Date: 2026-10-19 10:41:06.274519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4b7e2d5a18'
+down_revision = '6e2a9c4f1b83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_price', sa.Float(), nullable=True))
+    # Existing items get the current price, the best record there is of it
+    op.execute('UPDATE order_items SET unit_price = '
+               '(SELECT price FROM products WHERE products.id = order_items.product_id)')
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_column('unit_price')
@@ -0,0 +1,33 @@
+"""add table versions
+
+Revision ID: a41d7e2c9b13
+Revises: 3f1c9a7b2d40
+Create Date: 2026-10-18 10:02:17.554031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d7e2c9b13'
+down_revision = '3f1c9a7b2d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [
+        {'table_name': 'products', 'version': 1},
+        {'table_name': 'categories', 'version': 1},
+        {'table_name': 'customers', 'version': 1},
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
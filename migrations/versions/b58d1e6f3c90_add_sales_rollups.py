@@ -0,0 +1,59 @@
+"""add sales rollups
+
+Revision ID: b58d1e6f3c90
+Revises: 7a3f5c2e9d14
+Create Date: 2026-10-18 17:21:09.884273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b58d1e6f3c90'
+down_revision = '7a3f5c2e9d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('units', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('sales_daily_product',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    with op.batch_alter_table('sales_daily_product', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_daily_product_product_id_day', ['product_id', 'day'], unique=False)
+
+    op.create_table('sales_daily_category',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'category_id')
+    )
+    rollup_watermarks = op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_id', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # The rollups start empty; the first `flask rollup-sales` folds in the history
+    op.bulk_insert(rollup_watermarks, [{'name': 'sales', 'last_id': 0}])
+
+
+def downgrade():
+    op.drop_table('rollup_watermarks')
+    op.drop_table('sales_daily_category')
+    with op.batch_alter_table('sales_daily_product', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_daily_product_product_id_day')
+
+    op.drop_table('sales_daily_product')
+    op.drop_table('sales_daily')
@@ -0,0 +1,28 @@
+"""add product sku
+
+Revision ID: c7e25f0a8d61
+Revises: a41d7e2c9b13
+Create Date: 2026-10-18 11:20:05.902716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e25f0a8d61'
+down_revision = 'a41d7e2c9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sku', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_products_sku', ['sku'])
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_products_sku', type_='unique')
+        batch_op.drop_column('sku')
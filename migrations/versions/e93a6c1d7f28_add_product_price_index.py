@@ -0,0 +1,26 @@
+"""add product price index
+
+Revision ID: e93a6c1d7f28
+Revises: 5b8e04d1f9a2
+Create Date: 2026-10-18 13:55:48.207163
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a6c1d7f28'
+down_revision = '5b8e04d1f9a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_price', ['price'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_price')
@@ -0,0 +1,46 @@
+"""add stock buckets and reservations
+
+Revision ID: f61b3d9a2c57
+Revises: d24e8a7b6f15
+Create Date: 2026-10-18 20:05:33.402918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f61b3d9a2c57'
+down_revision = 'd24e8a7b6f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_buckets',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('product_id', 'bucket')
+    )
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reservation_id', sa.String(length=32), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.create_index('ix_stock_reservations_reservation_id', ['reservation_id'], unique=False)
+        batch_op.create_index('ix_stock_reservations_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_reservations_expires_at')
+        batch_op.drop_index('ix_stock_reservations_reservation_id')
+
+    op.drop_table('stock_reservations')
+    op.drop_table('stock_buckets')
@@ -0,0 +1,87 @@
+"""Micro-benchmark of list serialization: hand-built dicts + stdlib json vs
+compiled serializers + the app's JSON provider.
+
+Rows come from a column-only select on an in-memory SQLite products table, the
+same shape the list endpoints serialize. Prints the best of several runs for
+each path and checks both produce the same JSON.
+
+    python scripts/bench_serializers.py
+    python scripts/bench_serializers.py --rows 50000 --repeat 7
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.serializers import JSONProvider, orjson, serializer
+
+FIELDS = ('id', 'name', 'price', 'description', 'category_id', 'sku', 'created_at', 'updated_at')
+
+
+def load_rows(count):
+    engine = sa.create_engine('sqlite://')
+    now = datetime.now()
+    with engine.begin() as conn:
+        db.metadata.create_all(conn)
+        conn.execute(sa.insert(Category), [{'id': 1, 'name': 'c'}])
+        conn.execute(sa.insert(Product), [
+            {'id': i, 'name': f'product {i}', 'price': i / 100, 'description': 'd' * 40,
+             'category_id': 1, 'sku': f'SKU-{i}', 'created_at': now, 'updated_at': now}
+            for i in range(1, count + 1)
+        ])
+        return conn.execute(sa.select(*[getattr(Product, f) for f in FIELDS])).all()
+
+
+def current_path(provider, rows):
+    # What the controllers did before: a dict comprehension per row with a type
+    # check on every value, encoded by Flask's stdlib provider
+    return provider.dumps({'products': [
+        {f: (v.isoformat() if isinstance(v, datetime) else v) for f, v in zip(FIELDS, row)}
+        for row in rows
+    ]})
+
+
+def compiled_path(provider, rows):
+    to_dict = serializer(Product, FIELDS)
+    return provider.dumps({'products': [to_dict(row) for row in rows]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stdlib, fast = DefaultJSONProvider(app), JSONProvider(app)
+    rows = load_rows(args.rows)
+    assert fast.loads(current_path(stdlib, rows)) == fast.loads(compiled_path(fast, rows))
+
+    print(f'{args.rows} rows, {len(FIELDS)} fields, orjson {"on" if orjson else "not installed"}')
+    runs = [
+        ('hand-built dicts + stdlib json', lambda: current_path(stdlib, rows)),
+        ('compiled serializer + stdlib json', lambda: compiled_path(stdlib, rows)),
+        ('compiled serializer + JSONProvider', lambda: compiled_path(fast, rows)),
+    ]
+    baseline = None
+    for label, run in runs:
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f'{label:<36} {best * 1000:8.1f} ms  {baseline / best:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Print the query plan of the hot controller queries.
+
+With no arguments the schema is built in an in-memory SQLite database and
+every plan is printed twice: without the secondary indexes and with them.
+Pass a database URL to print the plans of an existing database instead
+(run it before and after `flask db upgrade`).
+
+    python scripts/explain_queries.py
+    python scripts/explain_queries.py mysql+pymysql://root:@localhost/e_commerce_db
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_tombstone import ProductTombstone
+
+
+def hot_queries():
+    since = datetime(2025, 1, 1)
+    until = since + timedelta(days=7)
+    return [
+        ('orders of a customer', sa.select(Order).where(Order.customer_id == 42, Order.id > 0)
+            .order_by(Order.id).limit(100)),
+        ('items of orders', sa.select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3]))),
+        ('products of a category', sa.select(Product).where(Product.category_id == 7, Product.id > 0)
+            .order_by(Product.id).limit(100)),
+        ('orders by created_at', sa.select(Order).where(Order.created_at.between(since, until))),
+        ('order items by created_at', sa.select(OrderItem).where(OrderItem.created_at.between(since, until))),
+        ('products by created_at', sa.select(Product).where(Product.created_at.between(since, until))),
+        ('customers by created_at', sa.select(Customer).where(Customer.created_at.between(since, until))),
+        ('products changed since', sa.select(Product).where(sa.or_(
+            Product.updated_at > since, sa.and_(Product.updated_at == since, Product.id > 42)
+        )).order_by(Product.updated_at, Product.id).limit(100)),
+    ]
+
+
+def secondary_indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def print_plans(conn, title):
+    print(f'== {title}')
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    for label, query in hot_queries():
+        sql = str(query.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+        print(f'-- {label}')
+        for row in conn.exec_driver_sql(prefix + sql):
+            print('   ', ' | '.join(str(value) for value in row))
+    print()
+
+
+def main():
+    if len(sys.argv) > 1:
+        engine = sa.create_engine(sys.argv[1])
+        with engine.connect() as conn:
+            print_plans(conn, engine.url.render_as_string(hide_password=True))
+        return
+
+    engine = sa.create_engine('sqlite://')
+    with engine.begin() as conn:
+        db.metadata.create_all(conn)
+        for index in secondary_indexes():
+            index.drop(conn)
+        print_plans(conn, 'without secondary indexes')
+        for index in secondary_indexes():
+            index.create(conn)
+        print_plans(conn, 'with secondary indexes')
+
+
+if __name__ == '__main__':
+    main()
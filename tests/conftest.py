@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+
+
+@pytest.fixture
+def app():
+    # A fresh database per test: in-memory SQLite unless TEST_DATABASE_URL is
+    # set. The schema lives on the primary; replica binds are never created.
+    app = create_app('config.TestingConfig')
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
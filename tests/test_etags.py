@@ -0,0 +1,62 @@
+import shutil
+
+import pytest
+
+from app import create_app
+from app.extensions import db, etags
+from app.models.category import Category
+from config import TestingConfig
+
+
+@pytest.fixture
+def category(app):
+    db.session.add(Category(name='c'))
+    db.session.commit()
+
+
+def test_failed_bump_answers_without_an_etag_until_a_retry_succeeds(client, category, monkeypatch):
+    before = client.get('/api/v1/categories/').headers['ETag']
+
+    def fail(names):
+        raise RuntimeError('table_versions unavailable')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(etags, '_write', fail)
+        assert client.post('/api/v1/categories/', json={'name': 'd'}).status_code == 201
+        response = client.get('/api/v1/categories/', headers={'If-None-Match': before})
+        assert response.status_code == 200 and 'ETag' not in response.headers
+
+    # The next conditional GET retries the bump
+    response = client.get('/api/v1/categories/', headers={'If-None-Match': before})
+    assert response.status_code == 200 and response.headers['ETag'] != before
+    after = response.headers['ETag']
+    assert client.get('/api/v1/categories/', headers={'If-None-Match': after}).status_code == 304
+
+
+def test_versions_are_read_from_the_primary(tmp_path):
+    # The "replica" is a copy of the primary that never catches up
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        DATABASE_REPLICA_URLS = [f'sqlite:///{replica}']
+        DB_REPLICA_CHECK_SECONDS = 0
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(Category(name='c'))
+        db.session.commit()
+        db.session.remove()
+    shutil.copy(primary, replica)
+
+    # Requests run outside that app context: `g` must not carry over between them
+    before = app.test_client().get('/api/v1/categories/').headers['ETag']
+    assert app.test_client().post('/api/v1/categories/', json={'name': 'd'}).status_code == 201
+    # An unpinned client reads the lagging replica, but must not get a 304
+    response = app.test_client().get('/api/v1/categories/', headers={'If-None-Match': before})
+    assert [c['name'] for c in response.get_json()] == ['c']
+    assert response.status_code == 200
+
+    with app.app_context():
+        db.drop_all(bind_key=None)
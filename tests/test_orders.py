@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+
+# (orders, items per order) of a small and a large order history, one customer each
+SMALL, LARGE = (3, 2), (60, 12)
+
+
+def seed_customer(orders, items):
+    # Returns (customer id, id of the customer's first order)
+    customer = Customer(name=f'c{orders}', email=f'c{orders}@example.com')
+    db.session.add(customer)
+    db.session.flush()
+    first = None
+    for _ in range(orders):
+        order = Order(customer_id=customer.id)
+        db.session.add(order)
+        db.session.flush()
+        first = first or order.id
+        db.session.add_all(OrderItem(order_id=order.id, product_id=i + 1, quantity=1) for i in range(items))
+    db.session.commit()
+    return customer.id, first
+
+
+@pytest.fixture
+def customers(app):
+    db.session.add(Category(name='c'))
+    db.session.flush()
+    db.session.add_all(Product(name=f'p{i}', price=1.0 + i, category_id=1) for i in range(LARGE[1]))
+    db.session.commit()
+    return seed_customer(*SMALL), seed_customer(*LARGE)
+
+
+def count_queries(client, url):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 200, (url, response.status_code)
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/orders/?customer_id={customer}&limit=100',
+    '/api/v1/orders/{order}',
+    '/api/v1/customers/{customer}/orders?limit=100',
+])
+def test_order_reads_issue_a_fixed_number_of_queries(client, customers, url):
+    # An N+1 regression makes the larger history cost more statements
+    small, large = (count_queries(client, url.format(customer=c, order=o)) for c, o in customers)
+    assert small == large
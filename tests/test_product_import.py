@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.category_stats import CategoryStats, refresh_category_stats
+from app.models.product import Product
+
+
+@pytest.fixture
+def category(app):
+    db.session.add(Category(name='c'))
+    db.session.commit()
+    return 1
+
+
+def import_ndjson(client, records, **args):
+    body = ''.join(json.dumps(record) + '\n' for record in records)
+    query = '&'.join(f'{k}={v}' for k, v in args.items())
+    response = client.post(f'/api/v1/products/import?{query}', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def stats():
+    return db.session.execute(
+        db.select(CategoryStats.category_id, CategoryStats.product_count, CategoryStats.price_sum,
+                  CategoryStats.min_price, CategoryStats.max_price).order_by(CategoryStats.category_id)
+    ).all()
+
+
+def test_repeated_sku_in_one_upsert_chunk_keeps_the_last_row(client, category):
+    import_ndjson(client, [
+        {'name': 'a', 'price': 10, 'category_id': category, 'sku': 'S1'},
+        {'name': 'b', 'price': 20, 'category_id': category, 'sku': 'S1'},
+    ], upsert='1')
+
+    assert db.session.execute(db.select(Product.sku, Product.name, Product.price)).all() == [('S1', 'b', 20.0)]
+    maintained = stats()
+    refresh_category_stats(db.session.connection())
+    assert maintained == stats() == [(category, 1, 20.0, 20.0, 20.0)]
+
+
+@pytest.mark.parametrize('record, error', [
+    ({'price': 'nan'}, "'price' must be a number"),
+    ({'price': 'inf'}, "'price' must be a number"),
+    ({'price': '-Infinity'}, "'price' must be a number"),
+    ({'price': True}, "'price' must be a number"),
+    ({'price': -1}, "'price' must not be negative"),
+    ({'category_id': 1.9}, "'category_id' must be an integer"),
+    ({'category_id': '1.9'}, "'category_id' must be an integer"),
+    ({'category_id': True}, "'category_id' must be an integer"),
+])
+def test_invalid_numbers_are_rejected_not_coerced(client, category, record, error):
+    summary = import_ndjson(client, [dict({'name': 'a', 'price': 1, 'category_id': category}, **record)])
+
+    assert summary['accepted'] == 0
+    assert summary['chunks'][0]['errors'] == [{'line': 1, 'error': error}]
+
+
+def test_csv_numbers_are_parsed(client, category):
+    body = f'name,price,category_id\na,2.5,{category}\n'
+    response = client.post('/api/v1/products/import?format=csv', data=body, content_type='text/csv')
+
+    assert response.get_json()['accepted'] == 1
+    assert db.session.execute(db.select(Product.price, Product.category_id)).all() == [(2.5, category)]
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.order_item import OrderItem
+from app.models.sales_rollup import SalesDaily
+from app.services.sales_rollup import rollup_sales
+
+
+@pytest.fixture
+def product(app):
+    db.session.add(Category(name='c'))
+    db.session.add(Customer(name='a', email='a@example.com'))
+    db.session.commit()
+    client = app.test_client()
+    assert client.post('/api/v1/products/', json={'name': 'p', 'price': 5.0, 'category_id': 1}).status_code == 201
+    return 1
+
+
+def order(client, product, quantity):
+    response = client.post('/api/v1/orders/', json={'customer_id': 1, 'items': [{'product_id': product, 'quantity': quantity}]})
+    assert response.status_code == 201
+    return response.get_json()['order_id']
+
+
+def revenue():
+    return db.session.scalar(db.select(db.func.sum(SalesDaily.revenue)))
+
+
+def test_repricing_does_not_rewrite_orders_or_sales(client, product):
+    order_id = order(client, product, 2)
+    assert client.put(f'/api/v1/products/{product}', json={'price': 100.0}).status_code == 200
+
+    body = client.get(f'/api/v1/orders/{order_id}').get_json()
+    assert body['items'][0]['unit_price'] == 5.0
+    assert body['total'] == 10.0
+    assert rollup_sales() == 1
+    assert revenue() == 10.0
+
+
+def test_items_without_created_at_do_not_stall_the_rollup(client, product):
+    order(client, product, 1)
+    order(client, product, 1)
+    db.session.execute(db.update(OrderItem).where(OrderItem.id == 1).values(created_at=None))
+    db.session.commit()
+
+    assert rollup_sales() == 1
+    order(client, product, 3)
+    assert rollup_sales() == 1
+    assert revenue() == 20.0
+
+
+def test_rollup_waits_for_unsettled_items(app, client, product):
+    app.config['ROLLUP_SETTLE_SECONDS'] = 60
+    for _ in range(3):
+        order(client, product, 1)
+    old = datetime.now() - timedelta(minutes=5)
+    db.session.execute(db.update(OrderItem).where(OrderItem.id != 2).values(created_at=old))
+    db.session.commit()
+
+    assert rollup_sales() == 1  # stops at item 2, still inside the settle lag
+    db.session.execute(db.update(OrderItem).values(created_at=old))
+    db.session.commit()
+    assert rollup_sales() == 2
@@ -0,0 +1,120 @@
+import os
+import threading
+
+import pytest
+
+from app import create_app
+from app.commands import sell_out
+from app.extensions import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.product import Product
+from app.services.inventory import OutOfStock, set_stock, stock_levels, take_stock
+from config import TestingConfig
+
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL', '')
+STOCK, THREADS, HOLD_SECONDS = 200, 8, 0.002
+MIN_SPEEDUP = 1.5  # most stripes vs one stripe
+
+
+@pytest.fixture
+def products(tmp_path):
+    # Concurrent checkouts need a connection each: a database file, not the
+    # in-memory one the other tests share. Returns (app, three product ids).
+    class StockConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = DATABASE_URL or f"sqlite:///{tmp_path / 'stock.db'}"
+
+    app = create_app(StockConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(Category(name='c'))
+        db.session.flush()
+        rows = [Product(name=f'p{n}', price=1.0, category_id=1) for n in range(3)]
+        db.session.add_all(rows)
+        db.session.commit()
+        yield app, [row.id for row in rows]
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.mark.parametrize('stripes', [1, 8])
+def test_concurrent_checkouts_never_oversell(products, stripes):
+    app, (product_id, _, _) = products
+    run = sell_out(app, product_id, STOCK, stripes, THREADS, HOLD_SECONDS)
+
+    assert not run['oversold'], run
+    assert run['remaining'] == 0 and run['checkouts'] == STOCK, run
+    assert run['workers_gave_up'] == 0, run
+
+
+def test_opposite_order_checkouts_do_not_deadlock(products):
+    # Alternating threads take (first, second) and (second, first)
+    app, (_, first, second) = products
+    for product_id in (first, second):
+        set_stock(product_id, STOCK, 4)
+    db.session.commit()
+    db.session.remove()
+    errors, lock = [], threading.Lock()
+
+    def worker(items):
+        with app.app_context():
+            for _ in range(STOCK // THREADS):
+                try:
+                    take_stock(items)
+                    db.session.commit()
+                except OutOfStock:
+                    db.session.rollback()
+                    return
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=([(first, 1), (second, 1)] if n % 2 else [(second, 1), (first, 1)],))
+               for n in range(THREADS)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    levels = stock_levels([first, second])
+    assert not errors
+    assert levels[first][0] == levels[second][0] == 0
+
+
+@pytest.mark.skipif(not DATABASE_URL.startswith('mysql'),
+                    reason='needs row locks; SQLite locks the whole database on write. '
+                           'Set TEST_DATABASE_URL to a MySQL database to run it')
+def test_throughput_grows_with_stripes(products):
+    app, (product_id, _, _) = products
+    one, many = (sell_out(app, product_id, STOCK, stripes, THREADS, HOLD_SECONDS) for stripes in (1, 8))
+
+    assert many['checkouts_per_second'] >= MIN_SPEEDUP * one['checkouts_per_second'], (one, many)
+
+
+@pytest.fixture
+def untracked_product(app):
+    # A product with no stock buckets: orders of it never take stock
+    db.session.add(Category(name='c'))
+    db.session.add(Customer(name='a', email='a@example.com'))
+    db.session.flush()
+    product = Product(name='p', price=1.0, category_id=1)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def test_unknown_reservation_is_rejected_for_untracked_products(client, untracked_product):
+    response = client.post('/api/v1/orders/', json={
+        'customer_id': 1, 'reservation_id': 'made-up', 'items': [{'product_id': untracked_product, 'quantity': 1}]
+    })
+
+    assert response.status_code == 409
+    assert db.session.scalar(db.select(db.func.count(Order.id))) == 0
+
+
+def test_reserving_only_untracked_products_is_rejected(client, untracked_product):
+    response = client.post('/api/v1/stock/reservations', json={'items': [{'product_id': untracked_product, 'quantity': 1}]})
+
+    assert response.status_code == 400